@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark Docker API round-trips per gateway inventory refresh.
+
+Compares the legacy path (list every container, then inspect each one and
+its image, then filter by name) against the label-filtered single list call
+used by DockerService.get_ignition_containers. Runs against the local Docker
+daemon:
+
+    python benchmarks/docker_inventory.py --runs 5
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.docker_service import DockerService
+
+class ApiCallCounter:
+    """Counts HTTP requests made by the docker client"""
+    
+    def __init__(self, api_client):
+        self.calls = 0
+        api_client.hooks['response'].append(self._on_response)
+    
+    def _on_response(self, response, *args, **kwargs):
+        self.calls += 1
+        return response
+
+def legacy_refresh(service):
+    """Inventory as it was built before the label-filtered list call"""
+    containers = service.get_all_containers()
+    return [container for container in containers if service._is_ignition_container(container)]
+
+def measure(name, refresh, counter, runs):
+    """Run a refresh several times and report API calls and wall time per run"""
+    counter.calls = 0
+    start_time = time.perf_counter()
+    for _ in range(runs):
+        gateways = refresh()
+    duration = time.perf_counter() - start_time
+    
+    print(f"{name:<16} gateways={len(gateways):<4} "
+          f"api_calls/refresh={counter.calls / runs:<8.1f} "
+          f"ms/refresh={duration * 1000 / runs:.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='Refreshes per path')
+    args = parser.parse_args()
+    
+    service = DockerService()
+    if not service.is_available():
+        print("Docker is not available")
+        return 1
+    
+    counter = ApiCallCounter(service.client.api)
+    measure('legacy', lambda: legacy_refresh(service), counter, args.runs)
+    measure('label-filtered', service.get_ignition_containers, counter, args.runs)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
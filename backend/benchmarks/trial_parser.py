@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for trial-info extraction from Ignition status pages.
+
+Compares the original BeautifulSoup html.parser + get_text() extraction with
+the precompiled, early-exit scanner in services.trial_parser. Pass a
+directory of captured status pages (saved from /main/system/gateway/status)
+to benchmark real pages; otherwise a synthetic page of similar shape is used:
+
+    python benchmarks/trial_parser.py --pages ./captured-pages --runs 200
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.trial_parser import PARSER_BACKEND, extract_trial_info_from_stream, parse_trial_info
+
+# Chunk sizes the streaming scanner is checked against the legacy parse with
+CHUNK_SIZES = (1, 7, 100, 512, 4096, 16384)
+
+def legacy_parse(html_content):
+    """Trial extraction as it was done before the streaming scanner"""
+    from bs4 import BeautifulSoup
+    
+    soup = BeautifulSoup(html_content, 'html.parser')
+    trial_patterns = [
+        r'trial.*?(\d+)\s*days?\s*remaining',
+        r'(\d+)\s*hours?\s*remaining',
+        r'trial.*?expires?\s*in\s*(\d+)'
+    ]
+    text_content = soup.get_text().lower()
+    for pattern in trial_patterns:
+        match = re.search(pattern, text_content)
+        if match:
+            return match
+    return None
+
+def legacy_hours(html_content):
+    """Remaining hours the legacy parse reports, None when it finds no countdown"""
+    match = legacy_parse(html_content)
+    if match is None:
+        return None
+    return int(match.group(1)) * (24 if 'day' in match.group(0) else 1)
+
+def check_equivalence(name, page):
+    """Fail loudly if the streaming scanner disagrees with the legacy parse at any chunk size"""
+    expected = legacy_hours(page)
+    body = page.encode('utf-8')
+    mismatches = []
+    for size in CHUNK_SIZES:
+        info = extract_trial_info_from_stream(chunked(body, size), max_bytes=len(body))
+        hours = info['remaining_hours'] if info and not info['expired'] else None
+        if hours != expected:
+            mismatches.append(f"chunk {size}: {hours}")
+    if mismatches:
+        print(f"{name}: legacy {expected} h, stream " + ', '.join(mismatches))
+    return not mismatches
+
+def edge_case_pages():
+    """Pages whose markers fall where a fixed chunk overlap used to miss them"""
+    filler = 'x' * 2000
+    return {
+        'far-trial-keyword': f"<div>Trial mode {filler} <b>6</b> days remaining</div>",
+        'hours-before-days': "<p>12 hours remaining</p>\n<div>Trial: 3 days remaining</div>",
+        'expires-digits-split': f"<div>Trial {filler} expires in 123</div>",
+        'keyword-on-other-line': f"<div>Trial mode</div>\n<div>{filler} 6 days remaining</div>"
+    }
+
+def synthetic_page():
+    """A status page with navigation, tables and scripts around the trial banner"""
+    rows = ''.join(
+        f"<tr><td class='name'>Module {i}</td><td class='state'>Running</td><td>8.1.{i % 50}</td></tr>"
+        for i in range(400)
+    )
+    script = "<script>window.__state = {" + ",".join(f'"k{i}": {i}' for i in range(2000)) + "};</script>"
+    return (
+        "<!DOCTYPE html><html><head><title>Gateway Status</title>" + script + "</head><body>"
+        "<nav>" + "<a href='#'>Link</a>" * 200 + "</nav>"
+        "<div class='banner'>Trial Mode: <span>5</span> days remaining</div>"
+        "<table>" + rows + "</table></body></html>"
+    )
+
+def chunked(data, size=16384):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+def measure(parse, runs):
+    start_time = time.perf_counter()
+    for _ in range(runs):
+        parse()
+    return (time.perf_counter() - start_time) * 1e6 / runs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', help='Directory of captured status page .html files')
+    parser.add_argument('--runs', type=int, default=100, help='Parses per page and method')
+    args = parser.parse_args()
+    
+    if args.pages:
+        pages = {os.path.basename(path): open(path, encoding='utf-8', errors='replace').read()
+                 for path in sorted(glob.glob(os.path.join(args.pages, '*.html')))}
+    else:
+        pages = {'synthetic': synthetic_page()}
+    
+    checked = dict(pages, **edge_case_pages())
+    if not all([check_equivalence(name, page) for name, page in checked.items()]):
+        return 1
+    print(f"stream matches legacy parse on {len(checked)} pages at chunk sizes {CHUNK_SIZES}")
+    
+    print(f"parser backend: {PARSER_BACKEND}")
+    for name, page in pages.items():
+        body = page.encode('utf-8')
+        legacy_us = measure(lambda: legacy_parse(page), args.runs)
+        document_us = measure(lambda: parse_trial_info(page), args.runs)
+        stream_us = measure(lambda: extract_trial_info_from_stream(chunked(body)), args.runs)
+        
+        print(f"{name} ({len(body) / 1024:.0f} KiB)")
+        print(f"  legacy bs4       {legacy_us:10.1f} us")
+        print(f"  document         {document_us:10.1f} us  ({legacy_us / document_us:.1f}x)")
+        print(f"  stream/early-out {stream_us:10.1f} us  ({legacy_us / stream_us:.1f}x)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -26,6 +26,66 @@ class Config:
     # Gateway configuration
     GATEWAY_CHECK_INTERVAL = int(os.environ.get('GATEWAY_CHECK_INTERVAL', 30))
     GATEWAY_TIMEOUT = int(os.environ.get('GATEWAY_TIMEOUT', 10))
+    GATEWAY_LIVENESS_INTERVAL = int(os.environ.get('GATEWAY_LIVENESS_INTERVAL', GATEWAY_CHECK_INTERVAL))
+    GATEWAY_TRIAL_INTERVAL = int(os.environ.get('GATEWAY_TRIAL_INTERVAL', 900))
+    GATEWAY_FAST_INTERVAL = int(os.environ.get('GATEWAY_FAST_INTERVAL', 5))
+    GATEWAY_MAX_INTERVAL = int(os.environ.get('GATEWAY_MAX_INTERVAL', 300))
+    GATEWAY_RESTART_WINDOW = int(os.environ.get('GATEWAY_RESTART_WINDOW', 120))
+    GATEWAY_TRIAL_URGENT_INTERVAL = int(os.environ.get('GATEWAY_TRIAL_URGENT_INTERVAL', 300))
+    TRIAL_URGENT_HOURS = int(os.environ.get('TRIAL_URGENT_HOURS', 48))
+    TRIAL_DRIFT_THRESHOLD_HOURS = float(os.environ.get('TRIAL_DRIFT_THRESHOLD_HOURS', 2))
+    TRIAL_SCRAPE_MAX_BYTES = int(os.environ.get('TRIAL_SCRAPE_MAX_BYTES', 512 * 1024))
+    GATEWAY_PROBE_WORKERS = int(os.environ.get('GATEWAY_PROBE_WORKERS', 8))
+    GATEWAY_CONNECT_TIMEOUT = float(os.environ.get('GATEWAY_CONNECT_TIMEOUT', 3))
+    GATEWAY_POOL_SIZE = int(os.environ.get('GATEWAY_POOL_SIZE', 2))
+    GATEWAY_PROBE_RETRIES = int(os.environ.get('GATEWAY_PROBE_RETRIES', 1))
+    GATEWAY_PROBE_BACKOFF = float(os.environ.get('GATEWAY_PROBE_BACKOFF', 0.5))
+    GATEWAY_CONFIG_DIR = os.environ.get('GATEWAY_CONFIG_DIR', '/opt/firebox/config/gateways')
+    GATEWAY_CONFIG_CHECK_INTERVAL = float(os.environ.get('GATEWAY_CONFIG_CHECK_INTERVAL', 5))
+    GATEWAY_FAILURE_THRESHOLD = int(os.environ.get('GATEWAY_FAILURE_THRESHOLD', 3))
+    GATEWAY_BREAKER_BASE_DELAY = float(os.environ.get('GATEWAY_BREAKER_BASE_DELAY', 10))
+    GATEWAY_BREAKER_MAX_DELAY = float(os.environ.get('GATEWAY_BREAKER_MAX_DELAY', 300))
+    GATEWAY_STATUS_DEADLINE_MS = int(os.environ.get('GATEWAY_STATUS_DEADLINE_MS', 2000))
+    
+    # Backend-to-gateway probing over the gateway network
+    GATEWAY_INTERNAL_PORT = int(os.environ.get('GATEWAY_INTERNAL_PORT', 8088))
+    NETWORK_PROBE_CONCURRENCY = int(os.environ.get('NETWORK_PROBE_CONCURRENCY', 100))
+    
+    # Background gateway-to-gateway connectivity monitor
+    CONNECTIVITY_CHECK_INTERVAL = int(os.environ.get('CONNECTIVITY_CHECK_INTERVAL', 60))
+    CONNECTIVITY_HISTORY_SIZE = int(os.environ.get('CONNECTIVITY_HISTORY_SIZE', 120))
+    CONNECTIVITY_WORKERS = int(os.environ.get('CONNECTIVITY_WORKERS', 4))
+    
+    # Gateway probe result cache
+    GATEWAY_CACHE_MAX_ENTRIES = int(os.environ.get('GATEWAY_CACHE_MAX_ENTRIES', 256))
+    GATEWAY_HEALTH_CACHE_TTL = int(os.environ.get('GATEWAY_HEALTH_CACHE_TTL', GATEWAY_MAX_INTERVAL))
+    GATEWAY_TRIAL_CACHE_TTL = int(os.environ.get('GATEWAY_TRIAL_CACHE_TTL', GATEWAY_TRIAL_INTERVAL))
+    GATEWAY_CACHE_STALE_WHILE_REVALIDATE = os.environ.get('GATEWAY_CACHE_STALE_WHILE_REVALIDATE', 'true').lower() == 'true'
+    # SQLite file shared by worker processes; empty disables sharing
+    GATEWAY_SHARED_CACHE_PATH = os.environ.get('GATEWAY_SHARED_CACHE_PATH', '/tmp/firebox/probe_cache.db')
+    
+    # Multi-replica coordination: 'none', or 'postgres' to elect one prober
+    GATEWAY_COORDINATION = os.environ.get('GATEWAY_COORDINATION', 'none').lower()
+    GATEWAY_LEADER_LOCK_ID = int(os.environ.get('GATEWAY_LEADER_LOCK_ID', 4607066))
+    
+    # Streaming gateway container logs
+    LOG_STREAM_TAIL = int(os.environ.get('LOG_STREAM_TAIL', 100))
+    LOG_STREAM_MAX_SECONDS = int(os.environ.get('LOG_STREAM_MAX_SECONDS', 300))
+    LOG_STREAM_RETRY_MS = int(os.environ.get('LOG_STREAM_RETRY_MS', 1000))
+    LOG_STREAM_KEEPALIVE_SECONDS = int(os.environ.get('LOG_STREAM_KEEPALIVE_SECONDS', 15))
+    
+    # Server-side gateway log search
+    LOG_SEARCH_MAX_MATCHES = int(os.environ.get('LOG_SEARCH_MAX_MATCHES', 1000))
+    LOG_SEARCH_MAX_CURSORS = int(os.environ.get('LOG_SEARCH_MAX_CURSORS', 32))
+    LOG_SEARCH_MAX_CONTEXT = int(os.environ.get('LOG_SEARCH_MAX_CONTEXT', 10))
+    LOG_SEARCH_TAIL = int(os.environ.get('LOG_SEARCH_TAIL', 10000))
+    LOG_SEARCH_MAX_LINES = int(os.environ.get('LOG_SEARCH_MAX_LINES', 100000))
+    LOG_SEARCH_MAX_MS = int(os.environ.get('LOG_SEARCH_MAX_MS', 5000))
+    
+    # Docker daemon availability tracking
+    DOCKER_PING_INTERVAL = float(os.environ.get('DOCKER_PING_INTERVAL', 30))
+    DOCKER_FAILURE_THRESHOLD = int(os.environ.get('DOCKER_FAILURE_THRESHOLD', 3))
+    DOCKER_RECONNECT_MAX_DELAY = float(os.environ.get('DOCKER_RECONNECT_MAX_DELAY', 60))
     
     # Trial reset configuration
     SELENIUM_HEADLESS = os.environ.get('SELENIUM_HEADLESS', 'true').lower() == 'true'
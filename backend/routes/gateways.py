@@ -1,16 +1,34 @@
-from flask import Blueprint, jsonify, request
-from utils import get_logger, RequestValidator, GatewayStatusSchema
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from prometheus_client import Counter
+from utils import get_logger, RequestValidator, GatewayStatusSchema, Deadline
 from marshmallow import ValidationError
 from services.docker_service import DockerService
 from services.gateway_service import GatewayService
+from services.status_snapshot import StatusSnapshotEngine
+from services.connectivity_monitor import ConnectivityMonitor
+from services.shared_probe_store import get_shared_probe_store
+from services.container_logs import format_sse, parse_log_cursor
+from services.log_search import LogSearch
+from config import Config
 import os
+import time
 
 gateways_bp = Blueprint('gateways', __name__)
 logger = get_logger('gateways')
 
+# Prometheus metrics
+DEADLINE_EXCEEDED = Counter(
+    'gateway_request_deadline_exceeded_total',
+    'Requests answered with partial data because the latency budget ran out',
+    ['endpoint']
+)
+
 # Global service instances - will be initialized when first needed
 docker_service = None
 gateway_service = None
+snapshot_engine = None
+connectivity_monitor = None
+log_search = None
 
 def get_gateway_service():
     """Get or initialize the gateway service"""
@@ -19,6 +37,7 @@ def get_gateway_service():
     if gateway_service is None:
         docker_service = DockerService()
         gateway_service = GatewayService(docker_service)
+        docker_service.start_event_watcher()
         
         # Set host IP from environment or default to localhost
         host_ip = os.getenv('HOST_IP', 'localhost')
@@ -28,20 +47,86 @@ def get_gateway_service():
     
     return gateway_service
 
+def get_snapshot_engine():
+    """Get or start the background status snapshot engine"""
+    global snapshot_engine
+    
+    if snapshot_engine is None:
+        snapshot_engine = StatusSnapshotEngine(get_gateway_service())
+        snapshot_engine.start()
+    
+    return snapshot_engine
+
+def get_connectivity_monitor():
+    """Get or start the background connectivity monitor"""
+    global connectivity_monitor
+    
+    if connectivity_monitor is None:
+        # Sweep on the same leader as status probing; other processes read its history
+        connectivity_monitor = ConnectivityMonitor(
+            get_gateway_service(),
+            coordinator=get_snapshot_engine().coordinator,
+            shared=get_shared_probe_store()
+        )
+        connectivity_monitor.start()
+    
+    return connectivity_monitor
+
+def get_log_search():
+    """Get the gateway log search, which keeps per-query cursors between requests"""
+    global log_search
+    
+    if log_search is None:
+        log_search = LogSearch(get_gateway_service())
+    
+    return log_search
+
+def get_status_snapshot():
+    """Get the current status snapshot, waiting only for the very first build"""
+    return get_snapshot_engine().get_snapshot(wait=Config.GATEWAY_TIMEOUT)
+
+def get_request_deadline():
+    """Latency budget for this request from ?deadline_ms, or the server default"""
+    return Deadline.from_args(
+        request.args,
+        default_ms=Config.GATEWAY_STATUS_DEADLINE_MS,
+        max_ms=Config.GATEWAY_TIMEOUT * 1000
+    )
+
+def record_deadline(endpoint, deadline):
+    """Count a request whose budget ran out before every gateway answered"""
+    if deadline.exceeded:
+        DEADLINE_EXCEEDED.labels(endpoint=endpoint).inc()
+        logger.warning("Request deadline exceeded, returning partial data",
+                       endpoint=endpoint, budget_ms=deadline.budget_ms)
+
 @gateways_bp.route('/status')
 def get_gateway_status():
     """Get status of all gateways"""
     try:
         logger.info("Getting gateway status")
         
-        gateway_service = get_gateway_service()
-        gateways = gateway_service.get_all_gateways()
+        try:
+            deadline = get_request_deadline()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        logger.info("Gateway status retrieved", gateway_count=len(gateways))
+        # Only the first snapshot can keep a request waiting; if it is not
+        # ready within the budget, answer from cached probe results
+        snapshot = get_snapshot_engine().get_snapshot(wait=deadline.remaining())
+        if snapshot.version:
+            gateways = list(snapshot.gateways)
+        else:
+            gateways = get_gateway_service().get_all_gateways(deadline=deadline)
+        record_deadline('status', deadline)
+        
+        logger.info("Gateway status retrieved", gateway_count=len(gateways), snapshot_version=snapshot.version)
         return jsonify({
             'gateways': gateways,
             'total': len(gateways),
-            'timestamp': request._environ.get('REQUEST_START_TIME', 0)
+            'timestamp': snapshot.created_at,
+            'snapshot': snapshot.to_metadata(),
+            'deadline': deadline.to_dict()
         })
         
     except Exception as e:
@@ -54,12 +139,25 @@ def get_single_gateway_status(gateway_name):
     try:
         logger.info("Getting single gateway status", gateway=gateway_name)
         
+        try:
+            deadline = get_request_deadline()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         gateway_service = get_gateway_service()
-        gateway_data = gateway_service.get_gateway_by_name(gateway_name)
+        gateway_data = gateway_service.get_gateway_by_name(gateway_name, deadline=deadline)
+        record_deadline('gateway_status', deadline)
         
         if gateway_data:
             logger.info("Gateway status retrieved", gateway=gateway_name)
             return jsonify(gateway_data)
+        elif deadline.exceeded:
+            # The container could not be looked up within the budget
+            return jsonify({
+                'error': 'Gateway lookup did not finish within the deadline',
+                'gateway': gateway_name,
+                'deadline': deadline.to_dict()
+            }), 504
         else:
             logger.warning("Gateway not found", gateway=gateway_name)
             return jsonify({'error': 'Gateway not found'}), 404
@@ -79,6 +177,7 @@ def restart_gateway(gateway_name):
         
         if success:
             logger.info("Gateway restart successful", gateway=gateway_name)
+            get_snapshot_engine().request_refresh()
             return jsonify({
                 'message': message,
                 'gateway': gateway_name,
@@ -104,12 +203,11 @@ def list_gateways():
     try:
         logger.info("Listing all gateways")
         
-        gateway_service = get_gateway_service()
-        all_gateways = gateway_service.get_all_gateways()
+        snapshot = get_status_snapshot()
         
         # Extract just the names and basic info
         gateway_list = []
-        for gateway in all_gateways:
+        for gateway in snapshot.gateways:
             gateway_list.append({
                 'name': gateway['name'],
                 'port': gateway.get('port'),
@@ -120,7 +218,8 @@ def list_gateways():
         logger.info("Gateway list retrieved", gateway_count=len(gateway_list))
         return jsonify({
             'gateways': gateway_list,
-            'count': len(gateway_list)
+            'count': len(gateway_list),
+            'snapshot': snapshot.to_metadata()
         })
         
     except Exception as e:
@@ -150,6 +249,109 @@ def get_gateway_logs(gateway_name):
         logger.error("Failed to get gateway logs", gateway=gateway_name, error=str(e))
         return jsonify({'error': 'Failed to retrieve gateway logs'}), 500
 
+@gateways_bp.route('/<gateway_name>/logs/stream')
+def stream_gateway_logs(gateway_name):
+    """Stream a gateway's container logs as Server-Sent Events"""
+    try:
+        # EventSource sends Last-Event-ID when it reconnects, which resumes
+        # the stream right after the last line it received
+        since = parse_log_cursor(request.headers.get('Last-Event-ID') or request.args.get('since'))
+        until = parse_log_cursor(request.args.get('until'))
+        tail = request.args.get('tail', type=int)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    follow = request.args.get('follow', 'true').lower() == 'true'
+    
+    # Following streams end after a while and are resumed by the client, so
+    # a forgotten tab does not hold a worker thread forever. Docker only
+    # checks until when a line arrives, so quiet containers send keepalives
+    # that let the deadline, and a client that went away, be noticed
+    stream_end = None
+    heartbeat = None
+    if follow:
+        stream_end = time.time_ns() + Config.LOG_STREAM_MAX_SECONDS * 1_000_000_000
+        until = min(until, stream_end) if until else stream_end
+        heartbeat = Config.LOG_STREAM_KEEPALIVE_SECONDS
+    
+    lines = get_gateway_service().stream_gateway_logs(gateway_name, since=since, until=until, follow=follow, tail=tail,
+                                                      heartbeat=heartbeat)
+    if lines is None:
+        logger.warning("Gateway not found", gateway=gateway_name)
+        return jsonify({'error': 'Gateway not found'}), 404
+    
+    def events():
+        yield f"retry: {Config.LOG_STREAM_RETRY_MS}\n\n"
+        try:
+            for line in lines:
+                if stream_end and time.time_ns() >= stream_end:
+                    break
+                if line is None:
+                    yield ": keepalive\n\n"
+                    continue
+                timestamp, _, text = line
+                yield format_sse(text, event_id=timestamp)
+        except Exception as e:
+            logger.error("Gateway log stream failed", gateway=gateway_name, error=str(e))
+            yield format_sse('Failed to stream gateway logs', event='error')
+            return
+        finally:
+            lines.close()
+        yield format_sse('', event='end')
+    
+    logger.info("Streaming gateway logs", gateway=gateway_name, since=since, follow=follow)
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@gateways_bp.route('/<gateway_name>/logs/search')
+def search_gateway_logs(gateway_name):
+    """Search a gateway's container logs by regex, level and time range"""
+    try:
+        pattern = request.args.get('q') or None
+        levels = frozenset(level.strip().upper() for level in request.args.get('level', '').split(',') if level.strip())
+        if not pattern and not levels:
+            return jsonify({'error': 'Provide a pattern (q) and/or level'}), 400
+        
+        try:
+            since = parse_log_cursor(request.args.get('since'))
+            until = parse_log_cursor(request.args.get('until'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        context = request.args.get('context', 0, type=int)
+        offset = max(0, request.args.get('offset', 0, type=int))
+        limit = min(max(1, request.args.get('limit', 50, type=int)), 200)
+        
+        try:
+            result = get_log_search().search(gateway_name, pattern, levels, since, until, context)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if result is None:
+            logger.warning("Gateway not found", gateway=gateway_name)
+            return jsonify({'error': 'Gateway not found'}), 404
+        
+        matches = result['matches']
+        next_offset = offset + limit if offset + limit < len(matches) else None
+        return jsonify({
+            'gateway': gateway_name,
+            'pattern': pattern,
+            'levels': sorted(levels),
+            'matches': matches[offset:offset + limit],
+            'total': len(matches),
+            'offset': offset,
+            'limit': limit,
+            'next_offset': next_offset,
+            'truncated': result['truncated'],
+            'cursor': result['cursor'],
+            'lines_read': result['lines_read'],
+            'incremental': result['incremental']
+        })
+        
+    except Exception as e:
+        logger.error("Failed to search gateway logs", gateway=gateway_name, error=str(e))
+        return jsonify({'error': 'Failed to search gateway logs'}), 500
+
 @gateways_bp.route('/ping', methods=['POST'])
 def ping_gateway():
     """Test connectivity between gateways"""
@@ -177,21 +379,67 @@ def ping_gateway():
         logger.error("Failed to ping gateway", error=str(e))
         return jsonify({'error': 'Failed to ping gateway'}), 500
 
+@gateways_bp.route('/network-probe')
+def probe_gateway_network():
+    """Probe every gateway from the backend over the gateway network"""
+    try:
+        logger.info("Probing gateway network")
+        
+        gateway_service = get_gateway_service()
+        report = gateway_service.probe_gateway_network()
+        
+        logger.info("Gateway network probe completed", total=report['total'], reachable=report['reachable'])
+        return jsonify(report)
+        
+    except Exception as e:
+        logger.error("Failed to probe gateway network", error=str(e))
+        return jsonify({'error': 'Failed to probe gateway network'}), 500
+
 @gateways_bp.route('/connectivity')
 def test_connectivity():
-    """Test connectivity between all configured gateway connections"""
+    """Latest connectivity results and per-link history from the background monitor"""
     try:
-        logger.info("Testing all gateway connections")
+        monitor = get_connectivity_monitor()
         
-        gateway_service = get_gateway_service()
-        results = gateway_service.test_all_connections()
+        # sweep=true tests every link now instead of reading the monitor;
+        # mode picks batched or per-pair execs, and compare=true also runs
+        # the other mode and reports its wall-clock time alongside
+        if request.args.get('sweep', 'false').lower() == 'true':
+            mode = request.args.get('mode', 'batched')
+            if mode not in ('batched', 'legacy'):
+                return jsonify({'error': 'mode must be batched or legacy'}), 400
+            compare = request.args.get('compare', 'false').lower() == 'true'
+            
+            logger.info("Testing all gateway connections", mode=mode, compare=compare)
+            
+            start_time = time.perf_counter()
+            results = monitor.sample(batched=mode == 'batched')
+            wall_time_ms = round((time.perf_counter() - start_time) * 1000, 2)
+            
+            response = monitor.get_report()
+            response.update({
+                'results': results,
+                'total_tests': len(results),
+                'mode': mode,
+                'wall_time_ms': wall_time_ms
+            })
+            
+            if compare:
+                other_mode = 'legacy' if mode == 'batched' else 'batched'
+                start_time = time.perf_counter()
+                get_gateway_service().test_all_connections(batched=other_mode == 'batched')
+                response[f'{other_mode}_wall_time_ms'] = round((time.perf_counter() - start_time) * 1000, 2)
+            
+            logger.info("Gateway connectivity test completed", tested_connections=len(results), mode=mode, wall_time_ms=wall_time_ms)
+            return jsonify(response)
         
-        logger.info("Gateway connectivity test completed", tested_connections=len(results))
-        return jsonify({
-            'results': results,
-            'total_tests': len(results),
-            'timestamp': request._environ.get('REQUEST_START_TIME', 0)
-        })
+        # Only the first request after startup waits, for the first sweep
+        if not monitor.wait_for_samples(Config.GATEWAY_TIMEOUT):
+            return jsonify({'error': 'Connectivity monitor has not completed a sweep yet'}), 503
+        
+        response = monitor.get_report()
+        response['total_tests'] = len(response['results'])
+        return jsonify(response)
         
     except Exception as e:
         logger.error("Failed to test connectivity", error=str(e))
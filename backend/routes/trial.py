@@ -1,7 +1,6 @@
 from flask import Blueprint, jsonify, request
 from services.trial_reset_service import TrialResetService
-from services.gateway_service import GatewayService
-from services.docker_service import DockerService
+from routes.gateways import get_gateway_service, get_snapshot_engine, get_status_snapshot
 from utils import get_logger, RequestValidator, TrialResetRequestSchema
 from marshmallow import ValidationError
 import os
@@ -11,11 +10,10 @@ logger = get_logger('trial')
 
 # Global service instances
 trial_reset_service = None
-gateway_service = None
 
 def get_trial_service():
     """Get or initialize the trial reset service"""
-    global trial_reset_service, gateway_service
+    global trial_reset_service
     
     if trial_reset_service is None:
         host_ip = os.getenv('HOST_IP', 'localhost')
@@ -23,15 +21,10 @@ def get_trial_service():
         
         trial_reset_service = TrialResetService(host_ip=host_ip, headless=headless)
         
-        # Also initialize gateway service for getting gateway info
-        if gateway_service is None:
-            docker_service = DockerService()
-            gateway_service = GatewayService(docker_service)
-            gateway_service.set_host_ip(host_ip)
-        
         logger.info("Trial services initialized", host_ip=host_ip, headless=headless)
     
-    return trial_reset_service, gateway_service
+    # Share the gateway service (and its status snapshot) with the gateway routes
+    return trial_reset_service, get_gateway_service()
 
 @trial_bp.route('/reset/<gateway_name>', methods=['POST'])
 def reset_gateway_trial(gateway_name):
@@ -63,6 +56,8 @@ def reset_gateway_trial(gateway_name):
         
         if result['success']:
             logger.info("Trial reset completed successfully", gateway=gateway_name)
+            gw_service.reset_trial_tracking(port)
+            get_snapshot_engine().request_refresh()
             return jsonify(result)
         else:
             logger.error("Trial reset failed", gateway=gateway_name, error=result.get('error'))
@@ -82,10 +77,9 @@ def get_trial_status():
     try:
         logger.info("Trial status requested")
         
-        _, gw_service = get_trial_service()
-        
-        # Get all gateways
-        all_gateways = gw_service.get_all_gateways()
+        # Read all gateways from the background status snapshot
+        snapshot = get_status_snapshot()
+        all_gateways = snapshot.gateways
         
         # Compile trial status summary
         trial_summary = {
@@ -94,11 +88,12 @@ def get_trial_status():
             'emergency_trials': 0,
             'expired_trials': 0,
             'unknown_trials': 0,
-            'gateways': []
+            'gateways': [],
+            'snapshot': snapshot.to_metadata()
         }
         
         for gateway in all_gateways:
-            trial_info = gateway.get('trial', {})
+            trial_info = gateway.get('trial') or {}
             
             gateway_trial = {
                 'name': gateway['name'],
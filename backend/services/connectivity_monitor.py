@@ -0,0 +1,387 @@
+import math
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+from prometheus_client import Counter, Gauge
+from config import Config
+from utils import get_logger
+
+logger = get_logger('connectivity_monitor')
+
+# Prometheus metrics
+LINK_LOSS_RATE = Gauge(
+    'gateway_link_loss_rate',
+    'Share of failed samples in the link history',
+    ['source', 'target']
+)
+LINK_PROBES = Counter(
+    'gateway_link_probes_total',
+    'Gateway links tested by the connectivity monitor',
+    ['trigger']
+)
+
+# Shared probe store keys: the sweep lease, and the history the sweeper publishes
+SWEEP_LEASE_KEY = 'connectivity_sweep'
+HISTORY_KEY = 'connectivity_history'
+
+# Container events after which a gateway's links may have changed
+RETEST_ACTIONS = ('start', 'restart', 'stop', 'die', 'kill', 'pause', 'unpause', 'health_status')
+
+def _percentile(sorted_values: List[float], percent: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.utcfromtimestamp(timestamp).isoformat() if timestamp else None
+
+class LinkHistory:
+    """Ring buffer of connectivity samples for one source -> target link"""
+    
+    def __init__(self, source: str, target: str, size: int):
+        self.source = source
+        self.target = target
+        # (sampled_at, success, response_time) tuples, oldest dropped first
+        self.samples = deque(maxlen=size)
+        self.last_result: Optional[Dict] = None
+        self.last_change: Optional[float] = None
+    
+    def record(self, result: Dict, sampled_at: float):
+        """Add a sample, noting when the link went up or down"""
+        success = bool(result.get('success'))
+        if self.last_result is not None and bool(self.last_result.get('success')) != success:
+            self.last_change = sampled_at
+        self.samples.append((sampled_at, success, result.get('response_time')))
+        self.last_result = result
+    
+    def stats(self) -> Dict:
+        """Latency percentiles, loss rate and last change over the buffered samples"""
+        latencies = sorted(rt for _, success, rt in self.samples if success and rt is not None)
+        failures = sum(1 for _, success, _ in self.samples if not success)
+        loss_rate = failures / len(self.samples) if self.samples else None
+        
+        return {
+            'source': self.source,
+            'target': self.target,
+            'up': bool(self.last_result and self.last_result.get('success')),
+            'samples': len(self.samples),
+            'p50_ms': _percentile(latencies, 50),
+            'p95_ms': _percentile(latencies, 95),
+            'p99_ms': _percentile(latencies, 99),
+            'loss_rate': round(loss_rate, 4) if loss_rate is not None else None,
+            'last_change': _isoformat(self.last_change),
+            'last_sample': _isoformat(self.samples[-1][0]) if self.samples else None
+        }
+    
+    def to_dict(self) -> Dict:
+        """Serializable form, for publishing to processes that do not sweep"""
+        return {
+            'source': self.source,
+            'target': self.target,
+            'samples': list(self.samples),
+            'last_result': self.last_result,
+            'last_change': self.last_change
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict, size: int) -> 'LinkHistory':
+        history = cls(data['source'], data['target'], size)
+        history.samples.extend(tuple(sample) for sample in data['samples'])
+        history.last_result = data['last_result']
+        history.last_change = data['last_change']
+        return history
+
+def connected_components(nodes: Iterable[str], edges: Iterable[tuple]) -> List[List[str]]:
+    """Groups of gateways joined by working links, ignoring link direction"""
+    neighbours = {node: set() for node in nodes}
+    for source, target in edges:
+        neighbours.setdefault(source, set()).add(target)
+        neighbours.setdefault(target, set()).add(source)
+    
+    components, seen = [], set()
+    for node in sorted(neighbours):
+        if node in seen:
+            continue
+        component, stack = [], [node]
+        seen.add(node)
+        while stack:
+            current = stack.pop()
+            component.append(current)
+            for neighbour in neighbours[current] - seen:
+                seen.add(neighbour)
+                stack.append(neighbour)
+        components.append(sorted(component))
+    return components
+
+class ConnectivityMonitor:
+    """Samples every configured gateway link in the background and keeps per-link history
+    
+    Only one process sweeps: the elected leader when replicas are coordinated,
+    otherwise the worker holding the shared store's sweep lease. The others
+    adopt the history it publishes.
+    """
+    
+    def __init__(self, gateway_service, interval: Optional[int] = None, history_size: Optional[int] = None,
+                 coordinator=None, shared=None):
+        self.gateway_service = gateway_service
+        self.interval = interval or Config.CONNECTIVITY_CHECK_INTERVAL
+        self.history_size = history_size or Config.CONNECTIVITY_HISTORY_SIZE
+        self.coordinator = coordinator
+        self.shared = shared
+        self._adopted_at = 0.0
+        
+        self._links: Dict[tuple, LinkHistory] = {}
+        self._last_sweep: Optional[float] = None
+        
+        # Which links touch which gateway, so a container event re-tests
+        # only that gateway's links instead of the whole matrix
+        self._links_by_gateway: Dict[str, Set[tuple]] = {}
+        self._pending_gateways: Set[str] = set()
+        self._wake = threading.Event()
+        self._last_retest: Optional[Dict] = None
+        
+        # Components are recomputed only when some link goes up or down
+        self._components: Optional[List[List[str]]] = None
+        
+        self._lock = threading.Lock()
+        self._sweep_lock = threading.Lock()
+        self._sampled = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        
+        self.gateway_service.docker_service.add_event_listener(self._on_container_event)
+    
+    def start(self):
+        """Start the background sampler if it is not already running"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='connectivity-monitor', daemon=True)
+            self._thread.start()
+        logger.info("Connectivity monitor started", interval=self.interval, history_size=self.history_size)
+    
+    def stop(self):
+        """Stop the background sampler"""
+        self._stop.set()
+        self._wake.set()
+    
+    def wait_for_samples(self, timeout: float) -> bool:
+        """Wait for the first sweep after startup; True once any link has history"""
+        return self._sampled.wait(timeout)
+    
+    def sample(self, batched: bool = True) -> List[Dict]:
+        """Test every configured link now and record the results"""
+        # Sweeps never overlap, so an on-demand sweep cannot race the schedule
+        with self._sweep_lock:
+            connections = self.gateway_service.get_configured_connections()
+            self._index_links(connections)
+            results = self.gateway_service.test_all_connections(batched=batched, connections=connections)
+            LINK_PROBES.labels(trigger='sweep').inc(len(connections))
+            self.record(results)
+            self._publish()
+        return results
+    
+    def retest_gateways(self, gateway_names: Iterable[str]) -> List[Dict]:
+        """Re-test only the links touching the given gateways and record the results"""
+        gateway_names = sorted(set(gateway_names))
+        with self._sweep_lock:
+            with self._lock:
+                keys = set()
+                for name in gateway_names:
+                    keys |= self._links_by_gateway.get(name, set())
+            if not keys:
+                return []
+            
+            connections = [{'source': source, 'target': target} for source, target in sorted(keys)]
+            results = self.gateway_service.test_all_connections(batched=True, connections=connections)
+            LINK_PROBES.labels(trigger='event').inc(len(connections))
+            self.record(results, full_sweep=False)
+            self._last_retest = {
+                'gateways': gateway_names,
+                'links': len(connections),
+                'at': _isoformat(time.time())
+            }
+            self._publish()
+        
+        logger.info("Re-tested gateway links after container event", gateways=gateway_names, links=len(connections))
+        return results
+    
+    def record(self, results: List[Dict], full_sweep: bool = True):
+        """Add one sample per link from a sweep's or re-test's results"""
+        sampled_at = time.time()
+        with self._lock:
+            for result in results:
+                key = (result['source'], result['target'])
+                history = self._links.get(key)
+                if history is None:
+                    history = LinkHistory(result['source'], result['target'], self.history_size)
+                    self._links[key] = history
+                    self._components = None
+                was_up = bool(history.last_result and history.last_result.get('success'))
+                history.record(result, sampled_at)
+                if was_up != bool(result.get('success')):
+                    self._components = None
+                LINK_LOSS_RATE.labels(source=key[0], target=key[1]).set(history.stats()['loss_rate'])
+            if full_sweep:
+                self._last_sweep = sampled_at
+        if full_sweep:
+            self._sampled.set()
+    
+    def get_report(self) -> Dict:
+        """Per-link statistics and latest results, without probing anything"""
+        with self._lock:
+            links = [history.stats() for history in self._links.values()]
+            results = [history.last_result for history in self._links.values() if history.last_result]
+            last_sweep = self._last_sweep
+            reachability = self._reachability()
+        
+        return {
+            'links': links,
+            'results': results,
+            'reachability': reachability,
+            'last_sweep': _isoformat(last_sweep),
+            'last_retest': self._last_retest,
+            'interval': self.interval,
+            'history_size': self.history_size
+        }
+    
+    def _index_links(self, connections: List[Dict]):
+        """Rebuild the gateway -> links index and drop links no longer configured"""
+        index: Dict[str, Set[tuple]] = {}
+        for connection in connections:
+            key = (connection['source'], connection['target'])
+            index.setdefault(key[0], set()).add(key)
+            index.setdefault(key[1], set()).add(key)
+        
+        with self._lock:
+            configured = {key for keys in index.values() for key in keys}
+            for key in set(self._links) - configured:
+                del self._links[key]
+                self._components = None
+            if set(index) != set(self._links_by_gateway):
+                self._components = None
+            self._links_by_gateway = index
+    
+    def _reachability(self) -> Dict:
+        """Connected components over working links; caller holds the lock"""
+        up = [key for key, history in self._links.items() if history.last_result and history.last_result.get('success')]
+        if self._components is None:
+            self._components = connected_components(self._links_by_gateway, up)
+        
+        return {
+            'components': self._components,
+            'isolated': [component[0] for component in self._components if len(component) == 1],
+            'links_up': len(up),
+            'links_down': sum(1 for history in self._links.values() if history.last_result) - len(up)
+        }
+    
+    def _claim_sweep(self) -> bool:
+        """Whether this process should sweep now; otherwise adopt the published history"""
+        if self.coordinator is not None:
+            if self.coordinator.elect():
+                return True
+            self._adopt(self.coordinator.load_connectivity())
+            return False
+        
+        if self.shared is not None:
+            row = self.shared.read(HISTORY_KEY)
+            if row is not None:
+                stored_at, published = row
+                self._adopt(published)
+                if time.time() - stored_at < self.interval:
+                    return False
+            return self.shared.claim(SWEEP_LEASE_KEY)
+        return True
+    
+    def _claim_retest(self) -> bool:
+        """Whether this process should re-test links after a container event"""
+        if self.coordinator is not None:
+            return self.coordinator.elect()
+        if self.shared is not None:
+            return self.shared.claim(SWEEP_LEASE_KEY)
+        return True
+    
+    def _publish(self):
+        """Share this process's history with the processes that do not sweep"""
+        with self._lock:
+            published = {
+                'links': [history.to_dict() for history in self._links.values()],
+                'last_sweep': self._last_sweep,
+                'last_retest': self._last_retest,
+                'published_at': time.time()
+            }
+            self._adopted_at = published['published_at']
+        
+        if self.coordinator is not None:
+            self.coordinator.publish_connectivity(published)
+        elif self.shared is not None:
+            self.shared.write(HISTORY_KEY, published)
+    
+    def _adopt(self, published: Optional[Dict]):
+        """Replace this process's history with a newer one published by the sweeper"""
+        if not published or published['published_at'] <= self._adopted_at:
+            return
+        
+        links = {
+            (data['source'], data['target']): LinkHistory.from_dict(data, self.history_size)
+            for data in published['links']
+        }
+        index: Dict[str, Set[tuple]] = {}
+        for key in links:
+            index.setdefault(key[0], set()).add(key)
+            index.setdefault(key[1], set()).add(key)
+        
+        with self._lock:
+            self._links = links
+            self._links_by_gateway = index
+            self._components = None
+            self._last_sweep = published['last_sweep']
+            self._last_retest = published['last_retest']
+            self._adopted_at = published['published_at']
+            for key, history in links.items():
+                LINK_LOSS_RATE.labels(source=key[0], target=key[1]).set(history.stats()['loss_rate'])
+        if published['last_sweep']:
+            self._sampled.set()
+    
+    def _on_container_event(self, gateway_name: str, action: str, container: Dict):
+        """Queue a re-test of a gateway's links when its container changes state"""
+        # Health changes arrive as e.g. "health_status: healthy"
+        if gateway_name and action.split(':')[0] in RETEST_ACTIONS:
+            with self._lock:
+                self._pending_gateways.add(gateway_name)
+            self._wake.set()
+    
+    def _run(self):
+        """Sampling loop: full sweeps on the interval, link re-tests on container events"""
+        next_sweep = 0.0
+        while not self._stop.is_set():
+            if time.monotonic() >= next_sweep:
+                # A full sweep covers every queued re-test
+                with self._lock:
+                    self._pending_gateways.clear()
+                # A process that does not sweep checks for new history more often
+                wait = min(self.interval, Config.GATEWAY_FAST_INTERVAL)
+                try:
+                    if self._claim_sweep():
+                        self.sample()
+                        wait = self.interval
+                except Exception as e:
+                    logger.error("Connectivity sweep failed", error=str(e))
+                next_sweep = time.monotonic() + wait
+            
+            self._wake.wait(max(0.0, next_sweep - time.monotonic()))
+            self._wake.clear()
+            
+            with self._lock:
+                pending, self._pending_gateways = self._pending_gateways, set()
+            if pending and not self._stop.is_set():
+                try:
+                    if self._claim_retest():
+                        self.retest_gateways(pending)
+                except Exception as e:
+                    logger.error("Connectivity re-test failed", gateways=sorted(pending), error=str(e))
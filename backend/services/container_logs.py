@@ -0,0 +1,107 @@
+import queue
+import re
+import threading
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+from typing import Iterable, Iterator, Optional, Tuple
+
+# Docker prefixes each line with an RFC3339Nano timestamp when asked to
+TIMESTAMP_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(?:\.(\d{1,9}))?(Z|[+-]\d{2}:\d{2})$')
+
+def timestamp_to_ns(value: str) -> Optional[int]:
+    """Nanoseconds since the epoch for an RFC3339 timestamp, or None if it is not one"""
+    match = TIMESTAMP_PATTERN.match(value)
+    if not match:
+        return None
+    
+    seconds, fraction, zone = match.groups()
+    epoch = int(datetime.strptime(seconds, '%Y-%m-%dT%H:%M:%S').replace(tzinfo=timezone.utc).timestamp())
+    if zone != 'Z':
+        offset = int(zone[1:3]) * 3600 + int(zone[4:6]) * 60
+        epoch -= offset if zone[0] == '+' else -offset
+    return epoch * 1_000_000_000 + int((fraction or '').ljust(9, '0'))
+
+def parse_log_cursor(value: Optional[str]) -> Optional[int]:
+    """A since/until value as epoch nanoseconds, from unix seconds or an RFC3339 timestamp"""
+    if value in (None, ''):
+        return None
+    
+    try:
+        # Decimal keeps the nanoseconds a float would round away
+        seconds = Decimal(value)
+    except (InvalidOperation, ValueError):
+        seconds = None
+    if seconds is not None:
+        if not seconds.is_finite() or seconds < 0:
+            raise ValueError(f'{value!r} is not a non-negative number of unix seconds')
+        try:
+            return int(seconds * 1_000_000_000)
+        except ArithmeticError:
+            raise ValueError(f'{value!r} is out of range')
+    
+    cursor = timestamp_to_ns(value)
+    if cursor is None:
+        raise ValueError(f'{value!r} is not unix seconds or an RFC3339 timestamp')
+    return cursor
+
+def split_log_line(line: str) -> Tuple[Optional[str], Optional[int], str]:
+    """Split a timestamped Docker log line into (timestamp, epoch nanoseconds, text)"""
+    timestamp, _, text = line.partition(' ')
+    cursor = timestamp_to_ns(timestamp)
+    if cursor is None:
+        return None, None, line
+    return timestamp, cursor, text
+
+def read_with_heartbeat(stream: Iterable[bytes], heartbeat: float) -> Iterator[Optional[bytes]]:
+    """Chunks of a blocking stream read on a helper thread, with None after each heartbeat seconds of silence
+    
+    The caller closes the stream to stop the helper, e.g. when the generator is closed.
+    """
+    chunks = queue.Queue(maxsize=64)
+    stopped = threading.Event()
+    done = object()
+    
+    def offer(item) -> bool:
+        # Give up once the consumer has gone, rather than blocking on a full queue
+        while not stopped.is_set():
+            try:
+                chunks.put(item, timeout=heartbeat)
+                return True
+            except queue.Full:
+                pass
+        return False
+    
+    def read():
+        try:
+            for chunk in stream:
+                if not offer(chunk):
+                    return
+        except Exception as e:
+            offer(e)
+        offer(done)
+    
+    threading.Thread(target=read, name='log-stream-reader', daemon=True).start()
+    try:
+        while True:
+            try:
+                item = chunks.get(timeout=heartbeat)
+            except queue.Empty:
+                yield None
+                continue
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stopped.set()
+
+def format_sse(data: str, event_id: Optional[str] = None, event: Optional[str] = None) -> str:
+    """Encode one Server-Sent Event"""
+    lines = []
+    if event:
+        lines.append(f'event: {event}')
+    if event_id:
+        lines.append(f'id: {event_id}')
+    lines.extend(f'data: {part}' for part in data.splitlines() or [''])
+    return '\n'.join(lines) + '\n\n'
@@ -0,0 +1,122 @@
+import threading
+import time
+from typing import Optional
+import docker
+from prometheus_client import Counter, Gauge
+from config import Config
+from utils import get_logger, CircuitBreaker
+
+logger = get_logger('docker_availability')
+
+# Prometheus metrics
+PINGS_AVOIDED = Counter('docker_pings_avoided_total', 'Docker availability checks answered without a ping')
+PINGS_SENT = Counter('docker_pings_total', 'Docker daemon pings sent', ['result'])
+DAEMON_AVAILABLE = Gauge('docker_daemon_available', 'Whether the Docker daemon is reachable (1) or not (0)')
+
+class DockerAvailabilityTracker:
+    """Tracks Docker daemon reachability from real API traffic instead of pinging on every call"""
+    
+    def __init__(self, ping_interval: Optional[float] = None):
+        self.ping_interval = ping_interval or Config.DOCKER_PING_INTERVAL
+        self.breaker = CircuitBreaker(
+            'docker',
+            failure_threshold=Config.DOCKER_FAILURE_THRESHOLD,
+            max_delay=Config.DOCKER_RECONNECT_MAX_DELAY
+        )
+        
+        self.client = None
+        self._last_success = 0.0
+        self._connect_lock = threading.Lock()
+        self._stop = threading.Event()
+        
+        self._connect()
+        self._thread = threading.Thread(target=self._run, name='docker-availability', daemon=True)
+        self._thread.start()
+    
+    def is_available(self) -> bool:
+        """Answer from tracked state; fails fast while the circuit is open"""
+        if not self.breaker.allow_request():
+            return False
+        
+        if self.breaker.state == CircuitBreaker.HALF_OPEN or self.client is None:
+            # This caller carries the single trial reconnect
+            return self._reconnect()
+        
+        PINGS_AVOIDED.inc()
+        return True
+    
+    def record_success(self):
+        """Note that the daemon answered a request"""
+        self._last_success = time.monotonic()
+        self.breaker.record_success()
+        DAEMON_AVAILABLE.set(1)
+    
+    def record_failure(self, error: Exception):
+        """Note a failed call; API errors mean the daemon answered, so only transport errors count"""
+        if isinstance(error, docker.errors.APIError):
+            self.record_success()
+            return
+        
+        was_open = self.breaker.is_open
+        self.breaker.record_failure()
+        if self.breaker.is_open:
+            DAEMON_AVAILABLE.set(0)
+            if not was_open:
+                logger.error("Docker daemon marked unavailable", error=str(error),
+                             retry_in=round(self.breaker.seconds_until_retry(), 1))
+    
+    def stop(self):
+        """Stop the background checker"""
+        self._stop.set()
+    
+    def _connect(self) -> bool:
+        """Create a Docker client whose responses feed the tracker"""
+        try:
+            client = docker.from_env()
+            # Every response from the daemon is proof it is up, so
+            # successful traffic replaces explicit pings
+            client.api.hooks['response'].append(self._on_response)
+            self.client = client
+            logger.info("Docker client initialized successfully")
+            return True
+        except Exception as e:
+            logger.error("Failed to initialize Docker client", error=str(e))
+            self.record_failure(e)
+            return False
+    
+    def _reconnect(self) -> bool:
+        """Rebuild the client if needed and confirm the daemon answers a ping"""
+        with self._connect_lock:
+            if self.client is None and not self._connect():
+                return False
+            return self._ping()
+    
+    def _ping(self) -> bool:
+        try:
+            self.client.ping()
+            PINGS_SENT.labels(result='success').inc()
+            self.record_success()
+            return True
+        except Exception as e:
+            PINGS_SENT.labels(result='failure').inc()
+            logger.error("Docker is not available", error=str(e))
+            self.record_failure(e)
+            # A fresh client is built on the next trial
+            self.client = None
+            return False
+    
+    def _on_response(self, response, *args, **kwargs):
+        self.record_success()
+        return response
+    
+    def _run(self):
+        """Ping only when no traffic has confirmed the daemon recently, and retry an open circuit"""
+        while not self._stop.wait(self.ping_interval):
+            idle = time.monotonic() - self._last_success
+            state = self.breaker.state
+            if state == CircuitBreaker.CLOSED and idle < self.ping_interval:
+                continue
+            if state == CircuitBreaker.OPEN:
+                continue
+            if self.breaker.allow_request():
+                self._reconnect()
@@ -1,34 +1,64 @@
 import docker
-import requests
+import copy
+import threading
 import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
 import json
 import re
-from utils import get_logger
+from utils import get_logger, Deadline
+from services.gateway_config import get_gateway_config_registry
+from services.docker_availability import DockerAvailabilityTracker
+from services.container_logs import read_with_heartbeat, split_log_line
 
 logger = get_logger('docker_service')
 
+# Labels set on every gateway service in docker-compose.yml
+GATEWAY_NAME_LABEL = 'gateway.name'
+GATEWAY_TYPE_LABEL = 'gateway.type'
+
+# Docker reports container health at the end of the list Status text,
+# e.g. "Up 2 hours (healthy)" or "Up 5 seconds (health: starting)"
+HEALTH_STATUS_PATTERN = re.compile(r'\((healthy|unhealthy|health: starting)\)')
+
+# A log line longer than this is passed on in pieces rather than buffered
+# whole; every piece carries the timestamp and cursor of the line's start
+MAX_LOG_LINE_BYTES = 64 * 1024
+
+# Container events that change what the gateway inventory reports
+INVENTORY_EVENTS = ['create', 'start', 'stop', 'die', 'kill', 'restart', 'pause', 'unpause', 'health_status', 'destroy']
+
 class DockerService:
     """Service for interacting with Docker containers and inspecting Ignition gateways"""
     
     def __init__(self):
-        try:
-            self.client = docker.from_env()
-            logger.info("Docker client initialized successfully")
-        except Exception as e:
-            logger.error("Failed to initialize Docker client", error=str(e))
-            self.client = None
+        # Daemon reachability is tracked from real API traffic, with an
+        # occasional background ping and a circuit breaker when it is down
+        self.availability = DockerAvailabilityTracker()
+        
+        # Gateway inventory kept current from the Docker events stream
+        self._inventory = {}
+        self._inventory_ready = False
+        self._inventory_lock = threading.Lock()
+        self._event_listeners = []
+        self._event_stream = None
+        self._event_thread = None
+        self._stop_events = threading.Event()
+        
+        # Gateway name -> container id, from the gateway.name label, with the
+        # CONTAINER_NAME values from the gateway env files as a fallback
+        self._gateway_index = {}
+        self._gateway_index_built = False
+        self.config_registry = get_gateway_config_registry()
+    
+    @property
+    def client(self):
+        """Docker client, rebuilt by the availability tracker after the daemon comes back"""
+        return self.availability.client
     
     def is_available(self) -> bool:
-        """Check if Docker is available"""
-        try:
-            if self.client:
-                self.client.ping()
-                return True
-        except Exception as e:
-            logger.error("Docker is not available", error=str(e))
-        return False
+        """Check if Docker is available without a ping round-trip"""
+        return self.availability.is_available()
     
     def get_all_containers(self) -> List[Dict]:
         """Get all containers with basic information"""
@@ -56,32 +86,203 @@ class DockerService:
             return container_info
             
         except Exception as e:
+            self.availability.record_failure(e)
             logger.error("Failed to get containers", error=str(e))
             return []
     
-    def get_ignition_containers(self) -> List[Dict]:
-        """Get containers that appear to be Ignition gateways"""
+    def get_ignition_containers(self, deadline: Optional[Deadline] = None) -> List[Dict]:
+        """Get Ignition gateway containers, served from the event-driven inventory when it is live"""
+        with self._inventory_lock:
+            if self._inventory_ready:
+                return [copy.deepcopy(container) for container in self._inventory.values()]
+        
+        if deadline is not None and deadline.expired:
+            deadline.mark_exceeded()
+            return []
+        
         if not self.is_available():
             return []
         
         try:
-            all_containers = self.get_all_containers()
-            ignition_containers = []
-            
-            for container in all_containers:
-                # Check if container looks like an Ignition gateway
-                if self._is_ignition_container(container):
-                    # Add Ignition-specific information
-                    container['gateway_info'] = self._get_gateway_info(container)
-                    ignition_containers.append(container)
+            ignition_containers = self._list_gateway_containers()
             
             logger.info("Found Ignition containers", count=len(ignition_containers))
             return ignition_containers
             
         except Exception as e:
+            self.availability.record_failure(e)
             logger.error("Failed to get Ignition containers", error=str(e))
             return []
     
+    def _list_gateway_containers(self, container_id: Optional[str] = None) -> List[Dict]:
+        """List gateway containers with a single label-filtered API call"""
+        # The daemon filters on the gateway labels, and the list payload
+        # already carries everything we need, so no per-container
+        # inspect or image lookups are made
+        filters = {'label': [GATEWAY_NAME_LABEL, GATEWAY_TYPE_LABEL]}
+        if container_id:
+            filters['id'] = container_id
+        
+        summaries = self.client.api.containers(all=True, filters=filters)
+        containers = [self._container_from_summary(summary) for summary in summaries]
+        self._index_containers(containers, complete=container_id is None)
+        return containers
+    
+    def _index_containers(self, containers: List[Dict], complete: bool = False):
+        """Record gateway name -> container id for listed containers"""
+        index = {} if complete else dict(self._gateway_index)
+        for container in containers:
+            index[container['gateway_info']['name'].upper()] = container['id']
+        self._gateway_index = index
+        if complete:
+            self._gateway_index_built = True
+    
+    def resolve_gateway(self, gateway_name: str, deadline: Optional[Deadline] = None) -> Optional[str]:
+        """Resolve a gateway name to a container id (or container name) without probing naming patterns"""
+        key = gateway_name.upper()
+        container_id = self._gateway_index.get(key)
+        if container_id:
+            return container_id
+        
+        # Build the label index once from a single list call, unless the
+        # request has no time left for it
+        out_of_time = deadline is not None and deadline.expired
+        if out_of_time:
+            deadline.mark_exceeded()
+        if not self._gateway_index_built and not out_of_time and self.is_available():
+            try:
+                self._list_gateway_containers()
+                container_id = self._gateway_index.get(key)
+                if container_id:
+                    return container_id
+            except Exception as e:
+                self.availability.record_failure(e)
+                logger.warning("Failed to build gateway index", error=str(e))
+        
+        return self.config_registry.container_names().get(key)
+    
+    def get_gateway_container(self, gateway_name: str, deadline: Optional[Deadline] = None) -> Optional[Dict]:
+        """Get a gateway's container information with at most one Docker call"""
+        container_ref = self.resolve_gateway(gateway_name, deadline)
+        if not container_ref:
+            logger.warning("Gateway container not found", gateway=gateway_name)
+            return None
+        
+        with self._inventory_lock:
+            if self._inventory_ready and container_ref in self._inventory:
+                return copy.deepcopy(self._inventory[container_ref])
+        
+        if deadline is not None and deadline.expired:
+            deadline.mark_exceeded()
+            return None
+        
+        if not self.is_available():
+            return None
+        
+        try:
+            if container_ref in self._gateway_index.values():
+                filters = {'id': container_ref}
+            else:
+                filters = {'name': f"^/{re.escape(container_ref)}$"}
+            summaries = self.client.api.containers(all=True, filters=filters)
+            if not summaries:
+                logger.warning("Gateway container not found", gateway=gateway_name, container=container_ref)
+                return None
+            return self._container_from_summary(summaries[0])
+        except Exception as e:
+            self.availability.record_failure(e)
+            logger.error("Failed to get gateway container", gateway=gateway_name, error=str(e))
+            return None
+    
+    def add_event_listener(self, callback: Callable[[str, str, Dict], None]):
+        """Register callback(gateway_name, action, container) for gateway container state changes"""
+        self._event_listeners.append(callback)
+    
+    def start_event_watcher(self):
+        """Start following Docker events to keep the gateway inventory current"""
+        if self._event_thread and self._event_thread.is_alive():
+            return
+        
+        self._stop_events.clear()
+        self._event_thread = threading.Thread(target=self._watch_events, name='docker-events', daemon=True)
+        self._event_thread.start()
+        logger.info("Docker event watcher started")
+    
+    def stop_event_watcher(self):
+        """Stop following Docker events"""
+        self._stop_events.set()
+        if self._event_stream is not None:
+            self._event_stream.close()
+    
+    def _watch_events(self):
+        """Prime the inventory, then apply container events as they arrive"""
+        retry_delay = 1
+        while not self._stop_events.is_set():
+            if not self.is_available():
+                self._stop_events.wait(retry_delay)
+                retry_delay = min(retry_delay * 2, 30)
+                continue
+            
+            try:
+                # Subscribe before listing so no change falls between the two
+                self._event_stream = self.client.events(
+                    decode=True,
+                    filters={'type': 'container', 'label': [GATEWAY_NAME_LABEL], 'event': INVENTORY_EVENTS}
+                )
+                containers = self._list_gateway_containers()
+                with self._inventory_lock:
+                    self._inventory = {container['id']: container for container in containers}
+                    self._inventory_ready = True
+                logger.info("Gateway inventory loaded", count=len(containers))
+                retry_delay = 1
+                
+                for event in self._event_stream:
+                    self._apply_event(event)
+                    
+            except Exception as e:
+                self.availability.record_failure(e)
+                if self._stop_events.is_set():
+                    break
+                logger.warning("Docker event stream interrupted", error=str(e), retry_in=retry_delay)
+            finally:
+                # Without a live stream the inventory can go stale, so fall
+                # back to listing on demand until it is rebuilt
+                with self._inventory_lock:
+                    self._inventory_ready = False
+            
+            self._stop_events.wait(retry_delay)
+            retry_delay = min(retry_delay * 2, 30)
+    
+    def _apply_event(self, event: Dict):
+        """Update the inventory entry for one container event and notify listeners"""
+        action = event.get('Action') or event.get('status', '')
+        container_id = (event.get('id') or event.get('Actor', {}).get('ID', ''))[:12]
+        attributes = event.get('Actor', {}).get('Attributes', {})
+        
+        if action == 'destroy':
+            with self._inventory_lock:
+                container = self._inventory.pop(container_id, None)
+            self._gateway_index = {
+                name: indexed_id for name, indexed_id in self._gateway_index.items() if indexed_id != container_id
+            }
+        else:
+            containers = self._list_gateway_containers(container_id)
+            container = containers[0] if containers else None
+            with self._inventory_lock:
+                if container:
+                    self._inventory[container_id] = container
+                else:
+                    self._inventory.pop(container_id, None)
+        
+        gateway_name = attributes.get(GATEWAY_NAME_LABEL) or (container or {}).get('gateway_info', {}).get('name')
+        logger.info("Gateway container event", gateway=gateway_name, action=action, container=container_id)
+        
+        for callback in self._event_listeners:
+            try:
+                callback(gateway_name, action, container or {})
+            except Exception as e:
+                logger.error("Container event listener failed", gateway=gateway_name, error=str(e))
+    
     def get_container_by_name(self, name: str) -> Optional[Dict]:
         """Get a specific container by name"""
         if not self.is_available():
@@ -104,17 +305,17 @@ class DockerService:
             logger.warning("Container not found", name=name)
             return None
         except Exception as e:
+            self.availability.record_failure(e)
             logger.error("Failed to get container", name=name, error=str(e))
             return None
     
     def restart_container(self, name: str) -> Tuple[bool, str]:
-        """Restart a container by name"""
+        """Restart a container by name or id"""
         if not self.is_available():
             return False, "Docker is not available"
         
         try:
-            container = self.client.containers.get(name)
-            container.restart()
+            self.client.api.restart(name)
             logger.info("Container restarted successfully", name=name)
             return True, f"Container {name} restarted successfully"
         except docker.errors.NotFound:
@@ -122,25 +323,11 @@ class DockerService:
             logger.warning(error_msg)
             return False, error_msg
         except Exception as e:
+            self.availability.record_failure(e)
             error_msg = f"Failed to restart container {name}: {str(e)}"
             logger.error(error_msg)
             return False, error_msg
     
-    def get_container_logs(self, name: str, lines: int = 100) -> str:
-        """Get logs from a container"""
-        if not self.is_available():
-            return "Docker is not available"
-        
-        try:
-            container = self.client.containers.get(name)
-            logs = container.logs(tail=lines, timestamps=True).decode('utf-8')
-            return logs
-        except docker.errors.NotFound:
-            return f"Container {name} not found"
-        except Exception as e:
-            logger.error("Failed to get container logs", name=name, error=str(e))
-            return f"Failed to get logs: {str(e)}"
-    
     def _extract_ports(self, container) -> Dict[str, int]:
         """Extract port mappings from container"""
         ports = {}
@@ -198,21 +385,58 @@ class DockerService:
         return False
     
     def _get_gateway_info(self, container: Dict) -> Dict:
-        """Get Ignition-specific gateway information"""
-        gateway_info = {
-            'name': self._extract_gateway_name(container.get('name', '')),
-            'web_port': self._get_web_port(container.get('ports', {})),
-            'status': 'unknown',
-            'trial_info': None
+        """Get Ignition-specific gateway information from container metadata only"""
+        # Gateway probing (status, trial info) is owned by GatewayService so
+        # listing containers never makes HTTP calls to the gateways
+        labels = container.get('labels') or {}
+        return {
+            'name': labels.get(GATEWAY_NAME_LABEL) or self._extract_gateway_name(container.get('name', '')),
+            'type': labels.get(GATEWAY_TYPE_LABEL),
+            'web_port': self._get_web_port(container.get('ports', {}))
         }
+    
+    def _container_from_summary(self, summary: Dict) -> Dict:
+        """Build container information from a low-level container list entry"""
+        names = summary.get('Names') or []
+        name = names[0].lstrip('/') if names else summary['Id'][:12]
+        
+        ports = {}
+        for binding in summary.get('Ports') or []:
+            # IPv4 and IPv6 bindings are listed separately; keep the first
+            if binding.get('PublicPort'):
+                ports.setdefault(str(binding['PrivatePort']), int(binding['PublicPort']))
         
-        # Try to get additional info from the gateway web interface
-        web_port = gateway_info['web_port']
-        if web_port:
-            gateway_info['status'] = self._check_gateway_status(web_port)
-            gateway_info['trial_info'] = self._get_trial_info(web_port)
+        image = summary.get('Image') or 'unknown'
+        if image.startswith('sha256:'):
+            image = 'unknown'
         
-        return gateway_info
+        state = summary.get('State', 'unknown')
+        container = {
+            'id': summary['Id'][:12],
+            'name': name,
+            'status': state,
+            'image': image,
+            'created': datetime.utcfromtimestamp(summary.get('Created', 0)).isoformat() + 'Z',
+            'ports': ports,
+            'labels': summary.get('Labels') or {},
+            'health': self._health_from_summary(state, summary.get('Status', ''))
+        }
+        container['gateway_info'] = self._get_gateway_info(container)
+        return container
+    
+    def _health_from_summary(self, state: str, status_text: str) -> str:
+        """Get container health from the list Status text, falling back to its state"""
+        match = HEALTH_STATUS_PATTERN.search(status_text or '')
+        if match:
+            return 'starting' if match.group(1) == 'health: starting' else match.group(1)
+        
+        # If no health check, determine based on status
+        if state == 'running':
+            return 'healthy'
+        elif state in ['exited', 'dead']:
+            return 'unhealthy'
+        else:
+            return 'starting'
     
     def _extract_gateway_name(self, container_name: str) -> str:
         """Extract gateway name from container name"""
@@ -231,49 +455,8 @@ class DockerService:
         
         return None
     
-    def _check_gateway_status(self, port: int) -> str:
-        """Check if gateway web interface is accessible"""
-        try:
-            # Try to access the gateway status page
-            url = f"http://localhost:{port}/system/gateway/status"
-            response = requests.get(url, timeout=5)
-            
-            if response.status_code == 200:
-                return 'healthy'
-            else:
-                return 'unhealthy'
-        except requests.exceptions.Timeout:
-            return 'starting'
-        except requests.exceptions.ConnectionError:
-            return 'unhealthy'
-        except Exception as e:
-            logger.warning("Failed to check gateway status", port=port, error=str(e))
-            return 'unknown'
-    
-    def _get_trial_info(self, port: int) -> Optional[Dict]:
-        """Get trial information from gateway"""
-        try:
-            # This is a simplified version - in reality, you'd need to parse
-            # the actual Ignition web interface or use the gateway API
-            url = f"http://localhost:{port}/system/gateway/status"
-            response = requests.get(url, timeout=5)
-            
-            if response.status_code == 200:
-                # Mock trial info - replace with actual parsing
-                return {
-                    'remaining_hours': 168,  # 7 days
-                    'remaining_display': '7 days',
-                    'expired': False,
-                    'emergency': False,
-                    'trial_state': 'TRIAL'
-                }
-        except Exception as e:
-            logger.warning("Failed to get trial info", port=port, error=str(e))
-        
-        return None
-    
-    def exec_command(self, container_name: str, command: str) -> Dict:
-        """Execute a command in a Docker container"""
+    def exec_command(self, container_name: str, command: Union[str, List[str]]) -> Dict:
+        """Execute a command (a string, or an argv list such as ['sh', '-c', script]) in a Docker container"""
         if not self.is_available():
             return {'success': False, 'error': 'Docker not available'}
         
@@ -314,6 +497,7 @@ class DockerService:
                 'error': f'Container {container_name} not found'
             }
         except Exception as e:
+            self.availability.record_failure(e)
             logger.error("Failed to execute command in container", 
                         container=container_name, 
                         command=command, 
@@ -329,8 +513,7 @@ class DockerService:
             return "Docker not available"
         
         try:
-            container = self.client.containers.get(container_name)
-            logs = container.logs(tail=lines, timestamps=True).decode('utf-8')
+            logs = self.client.api.logs(container_name, tail=lines, timestamps=True).decode('utf-8')
             logger.info("Retrieved container logs", container=container_name, lines=lines)
             return logs
             
@@ -338,5 +521,70 @@ class DockerService:
             logger.error("Container not found for logs", container=container_name)
             return f"Container {container_name} not found"
         except Exception as e:
+            self.availability.record_failure(e)
             logger.error("Failed to get container logs", container=container_name, error=str(e))
-            return f"Error retrieving logs: {str(e)}"
\ No newline at end of file
+            return f"Error retrieving logs: {str(e)}"
+    
+    def stream_container_logs(self, container_name: str, since: Optional[int] = None, until: Optional[int] = None,
+                              follow: bool = True, tail: Union[int, str] = 'all',
+                              heartbeat: Optional[float] = None) -> Iterator[Optional[Tuple[str, int, str]]]:
+        """Yield (timestamp, epoch ns, text) for each log line as Docker produces it
+        
+        since and until are epoch nanoseconds; lines at or before since are
+        skipped, so the last delivered timestamp can be passed back to resume.
+        With a heartbeat, None is yielded after each heartbeat seconds without
+        output, so a caller can keep time while the container is quiet.
+        """
+        if not self.is_available():
+            raise docker.errors.DockerException("Docker not available")
+        
+        stream = self.client.api.logs(
+            container_name,
+            stream=True,
+            follow=follow,
+            timestamps=True,
+            tail=tail,
+            since=since / 1_000_000_000 if since else None,
+            until=until / 1_000_000_000 if until else None
+        )
+        buffer = b''
+        # Timestamp and cursor of an over-long line whose later pieces are still to come
+        continued = None
+        chunks = stream if heartbeat is None else read_with_heartbeat(stream, heartbeat)
+        try:
+            for chunk in chunks:
+                if chunk is None:
+                    yield None
+                    continue
+                buffer += chunk
+                lines = buffer.split(b'\n')
+                buffer = lines.pop()
+                pieces = [(raw, True) for raw in lines]
+                while len(buffer) > MAX_LOG_LINE_BYTES:
+                    cut = MAX_LOG_LINE_BYTES
+                    # Never split a UTF-8 character between pieces
+                    while cut > MAX_LOG_LINE_BYTES - 3 and buffer[cut] & 0xC0 == 0x80:
+                        cut -= 1
+                    pieces.append((buffer[:cut], False))
+                    buffer = buffer[cut:]
+                
+                for raw, line_ends in pieces:
+                    text = raw.decode('utf-8', errors='replace').rstrip('\r')
+                    if continued is None:
+                        timestamp, cursor, text = split_log_line(text)
+                        if cursor is None:
+                            continue
+                    else:
+                        timestamp, cursor = continued
+                    continued = None if line_ends else (timestamp, cursor)
+                    
+                    if since and cursor <= since:
+                        continue
+                    if until and cursor > until:
+                        return
+                    yield timestamp, cursor, text
+        finally:
+            # Closing the stream also unblocks the heartbeat reader thread
+            stream.close()
+            if chunks is not stream:
+                chunks.close()
\ No newline at end of file
@@ -0,0 +1,142 @@
+import glob
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from config import Config
+from utils import get_logger
+
+logger = get_logger('gateway_config')
+
+NETWORK_HOST_KEY = re.compile(r'^GATEWAY_NETWORK_(\d+)_HOST$')
+
+def parse_env_file(path: str) -> Dict[str, str]:
+    """Parse KEY=VALUE lines from a gateway env file"""
+    values = {}
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#') and '=' in line:
+                key, value = line.split('=', 1)
+                values[key] = value
+    return values
+
+def build_connections(gateways: Dict[str, Dict[str, str]]) -> List[Dict]:
+    """Gateway-to-gateway links from each gateway's enabled GATEWAY_NETWORK_<n>_* entries"""
+    # Hosts may name the gateway or its container hostname / service name
+    aliases = {}
+    for name, values in gateways.items():
+        for alias in (values.get('CONTAINER_HOSTNAME'), values.get('SERVICE_NAME'), name):
+            if alias:
+                aliases[alias.upper()] = name
+    
+    connections = []
+    for source in sorted(gateways):
+        values = gateways[source]
+        indexes = sorted(int(match.group(1)) for match in map(NETWORK_HOST_KEY.match, values) if match)
+        for index in indexes:
+            host = values[f'GATEWAY_NETWORK_{index}_HOST'].strip()
+            if not host or values.get(f'GATEWAY_NETWORK_{index}_ENABLED', 'true').lower() != 'true':
+                continue
+            port = values.get(f'GATEWAY_NETWORK_{index}_PORT')
+            connections.append({
+                'source': source,
+                'target': aliases.get(host.upper(), host.upper()),
+                'port': int(port) if port and port.isdigit() else None
+            })
+    return connections
+
+class GatewayConfigRegistry:
+    """Gateway env files from the gateway config directory, parsed once and re-read when they change"""
+    
+    def __init__(self, config_dir: Optional[str] = None, check_interval: Optional[float] = None):
+        self.config_dir = config_dir or Config.GATEWAY_CONFIG_DIR
+        self.check_interval = Config.GATEWAY_CONFIG_CHECK_INTERVAL if check_interval is None else check_interval
+        self._gateways: Dict[str, Dict[str, str]] = {}
+        self._connections: List[Dict] = []
+        self._signature: Tuple = ()
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.reload()
+    
+    def reload(self):
+        """Re-read every gateway env file"""
+        signature = self._file_signature()
+        gateways = {}
+        for path, _, _ in signature:
+            name = os.path.splitext(os.path.basename(path))[0].upper()
+            try:
+                gateways[name] = parse_env_file(path)
+            except OSError as e:
+                logger.warning("Failed to read gateway config", gateway=name, path=path, error=str(e))
+        connections = build_connections(gateways)
+        
+        with self._lock:
+            self._gateways = gateways
+            self._connections = connections
+            self._signature = signature
+            self._checked_at = time.monotonic()
+        logger.info("Gateway configs loaded", count=len(gateways), connections=len(connections), config_dir=self.config_dir)
+    
+    def get(self, name: str) -> Optional[Dict[str, str]]:
+        """Get the raw env values for a gateway"""
+        self._reload_if_changed()
+        return self._gateways.get(name.upper())
+    
+    def names(self):
+        """Names of every configured gateway"""
+        self._reload_if_changed()
+        return list(self._gateways.keys())
+    
+    def container_names(self) -> Dict[str, str]:
+        """Map gateway name to the CONTAINER_NAME from its env file"""
+        self._reload_if_changed()
+        return {
+            name: values['CONTAINER_NAME']
+            for name, values in self._gateways.items()
+            if values.get('CONTAINER_NAME')
+        }
+    
+    def connections(self) -> List[Dict]:
+        """Configured gateway-to-gateway links as source, target and port"""
+        self._reload_if_changed()
+        return list(self._connections)
+    
+    def _file_signature(self) -> Tuple:
+        """(path, mtime, size) for every env file; any edit, addition or removal changes it"""
+        signature = []
+        for path in sorted(glob.glob(os.path.join(self.config_dir, '*.env'))):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+    
+    def _reload_if_changed(self):
+        """Stat the env files at most once per check interval and reload if any changed"""
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if time.monotonic() - self._checked_at < self.check_interval:
+                return
+            self._checked_at = time.monotonic()
+        
+        if self._file_signature() != self._signature:
+            logger.info("Gateway config files changed, reloading", config_dir=self.config_dir)
+            self.reload()
+
+# Shared registry so env files are parsed once per process
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_gateway_config_registry() -> GatewayConfigRegistry:
+    """Get the process-wide gateway config registry"""
+    global _registry
+    
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = GatewayConfigRegistry()
+    return _registry
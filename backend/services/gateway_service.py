@@ -1,14 +1,69 @@
 import requests
+import threading
 import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 import json
-import re
-from bs4 import BeautifulSoup
-from utils import get_logger
+import shlex
+from collections import OrderedDict
+from prometheus_client import Counter, Histogram
+from config import Config
+from utils import get_logger, CircuitBreaker, Deadline
+from services.probe_cache import ProbeCache
+from services.probe_executor import ProbeExecutor
+from services.network_prober import NetworkProber, targets_from_registry
+from services.shared_probe_store import get_shared_probe_store
+from services.http_pool import get_session_pool
+from services.probe_scheduler import ProbeScheduler, LIVENESS, TRIAL
+from services.trial_clock import TrialClock
+from services.trial_parser import extract_trial_info_from_stream
 
 logger = get_logger('gateway_service')
 
+# Prometheus metrics
+PROBE_TIER_DURATION = Histogram(
+    'gateway_probe_tier_duration_seconds',
+    'Time spent on one gateway probe, by probe tier',
+    ['tier']
+)
+PROBES_SHORT_CIRCUITED = Counter(
+    'gateway_probes_short_circuited_total',
+    'Gateway probes skipped because the gateway circuit was open',
+    ['tier']
+)
+
+# Ignition endpoints: a small JSON liveness check and the full status page
+STATUS_PING_PATH = "/StatusPing"
+STATUS_PAGE_PATH = "/main/system/gateway/status"
+
+# StatusPing reports the gateway's run state, e.g. {"state": "RUNNING"}
+STATUS_PING_STATES = {
+    'RUNNING': 'healthy',
+    'STARTING': 'starting',
+    'RESTARTING': 'starting',
+    'INITIALIZING': 'starting',
+}
+
+# Tests every target of one source gateway in parallel inside a single
+# exec, trying ping, then HTTP, then a bare port check like the per-pair
+# path. Prints "<target> <method> <elapsed microseconds>" per target
+CONNECTIVITY_SCRIPT = """
+probe() {
+  start=$(date +%s%N)
+  if ping -c 1 -W 3 "$2" >/dev/null 2>&1; then method=ping
+  elif curl -s -o /dev/null --connect-timeout 5 "http://$2:$3" >/dev/null 2>&1; then method=http
+  elif nc -z -w 3 "$2" "$3" >/dev/null 2>&1; then method=port_check
+  else method=none
+  fi
+  end=$(date +%s%N)
+  echo "$1 $method $(( (end - start) / 1000 ))"
+}
+"""
+
+def _is_probed_result(result) -> bool:
+    """Whether a probe result came from the gateway, rather than mock data or a fallback"""
+    return not (isinstance(result, dict) and (result.get('mock') or result.get('fallback')))
+
 class GatewayService:
     """Service for managing Ignition gateways and their status"""
     
@@ -16,26 +71,62 @@ class GatewayService:
         self.docker_service = docker_service
         self.host_ip = "localhost"  # Default to localhost
         
-        # Cache for gateway status to avoid too frequent requests
-        self._status_cache = {}
-        self._cache_duration = 30  # seconds
+        # Cache for gateway status to avoid too frequent requests. The
+        # scheduler decides per gateway when each probe tier is due again,
+        # and concurrent callers that miss on a gateway share one probe.
+        # Expired results are served marked stale while they are refreshed.
+        # Worker processes share results so each gateway is probed once
+        self._status_cache = ProbeCache(
+            'gateway_status',
+            ttls={
+                'health': Config.GATEWAY_HEALTH_CACHE_TTL,
+                'trial': Config.GATEWAY_TRIAL_CACHE_TTL
+            },
+            shared=get_shared_probe_store(),
+            on_shared_result=self._on_shared_probe_result,
+            shareable=_is_probed_result
+        )
+        self.scheduler = ProbeScheduler()
+        
+        # Trial countdowns are extrapolated between scheduled scrapes
+        self.trial_clock = TrialClock()
+        
+        # Probes for all gateways run concurrently over keep-alive sessions
+        self.probe_executor = ProbeExecutor()
+        # Connectivity sweeps hold a thread per source gateway for seconds, so
+        # they get their own pool and never queue status probes behind them
+        self.connectivity_executor = ProbeExecutor(Config.CONNECTIVITY_WORKERS, name='connectivity')
+        self.session_pool = get_session_pool()
+        
+        # Gateways that keep timing out are skipped until their backoff
+        # elapses, so a dead gateway no longer costs a full timeout per refresh
+        self._breakers: Dict[int, CircuitBreaker] = {}
+        self._breakers_lock = threading.Lock()
+        
+        # Drop cached probe results as soon as Docker reports a state change
+        self.docker_service.add_event_listener(self._on_container_event)
     
     def set_host_ip(self, host_ip: str):
         """Set the host IP for gateway connections"""
         self.host_ip = host_ip
         logger.info("Host IP updated", host_ip=host_ip)
     
-    def get_all_gateways(self) -> List[Dict]:
-        """Get status of all gateways"""
+    def get_all_gateways(self, deadline: Optional[Deadline] = None) -> List[Dict]:
+        """Get status of all gateways, within the request's deadline if one is given"""
         try:
             # Get Ignition containers from Docker
-            containers = self.docker_service.get_ignition_containers()
-            gateways = []
-            
-            for container in containers:
-                gateway_data = self._process_gateway_container(container)
-                if gateway_data:
-                    gateways.append(gateway_data)
+            containers = self.docker_service.get_ignition_containers(deadline=deadline)
+            
+            # Probe every gateway at once; results keep the container order.
+            # Gateways that miss the deadline get their last known status
+            results = self.probe_executor.map(
+                lambda container: self._process_gateway_container(container, allow_stale=False),
+                containers,
+                label=lambda container: container.get('name', 'unknown'),
+                timeout=deadline.remaining() if deadline else None,
+                on_timeout=lambda container: self._last_known_gateway(container, deadline)
+            )
+            gateways = [gateway_data for gateway_data in results if gateway_data]
             
             # If no containers found, return mock data for development
             if not gateways:
@@ -50,20 +141,20 @@ class GatewayService:
             # Return mock data on error for development
             return self._get_mock_gateways()
     
-    def get_gateway_by_name(self, name: str) -> Optional[Dict]:
-        """Get status of a specific gateway by name"""
+    def get_gateway_by_name(self, name: str, deadline: Optional[Deadline] = None) -> Optional[Dict]:
+        """Get status of a specific gateway by name, within the request's deadline if one is given"""
         try:
-            # First try to get from Docker
-            container = self.docker_service.get_container_by_name(f"ignition-{name.lower()}")
-            if container:
+            container = self.docker_service.get_gateway_container(name, deadline=deadline)
+            if container and deadline is None:
                 return self._process_gateway_container(container)
-            
-            # Try alternative naming patterns
-            alt_names = [name.lower(), f"{name.lower()}-gateway", f"gateway-{name.lower()}"]
-            for alt_name in alt_names:
-                container = self.docker_service.get_container_by_name(alt_name)
-                if container:
-                    return self._process_gateway_container(container)
+            if container:
+                return self.probe_executor.map(
+                    lambda container: self._process_gateway_container(container, allow_stale=False),
+                    [container],
+                    label=lambda container: container.get('name', 'unknown'),
+                    timeout=deadline.remaining(),
+                    on_timeout=lambda container: self._last_known_gateway(container, deadline)
+                )[0]
             
             logger.warning("Gateway container not found", name=name)
             return None
@@ -75,28 +166,20 @@ class GatewayService:
     def restart_gateway(self, name: str) -> tuple[bool, str]:
         """Restart a gateway container"""
         try:
-            # Try different container naming patterns
-            container_names = [
-                f"ignition-{name.lower()}",
-                name.lower(),
-                f"{name.lower()}-gateway",
-                f"gateway-{name.lower()}"
-            ]
-            
-            for container_name in container_names:
-                success, message = self.docker_service.restart_container(container_name)
-                if success:
-                    # Clear cache for this gateway
-                    cache_key = f"status_{name}"
-                    if cache_key in self._status_cache:
-                        del self._status_cache[cache_key]
-                    
-                    logger.info("Gateway restarted successfully", gateway=name, container=container_name)
-                    return True, f"Gateway {name} restarted successfully"
-            
-            error_msg = f"Gateway {name} container not found"
-            logger.warning(error_msg)
-            return False, error_msg
+            container_ref = self.docker_service.resolve_gateway(name)
+            if not container_ref:
+                error_msg = f"Gateway {name} container not found"
+                logger.warning(error_msg)
+                return False, error_msg
+            
+            success, message = self.docker_service.restart_container(container_ref)
+            if not success:
+                return False, message
+            
+            # Cached status for this gateway is dropped by the container
+            # events the restart produces
+            logger.info("Gateway restarted successfully", gateway=name, container=container_ref)
+            return True, f"Gateway {name} restarted successfully"
             
         except Exception as e:
             error_msg = f"Failed to restart gateway {name}: {str(e)}"
@@ -106,33 +189,93 @@ class GatewayService:
     def get_gateway_logs(self, name: str, lines: int = 100) -> str:
         """Get logs from a gateway container"""
         try:
-            container_names = [
-                f"ignition-{name.lower()}",
-                name.lower(),
-                f"{name.lower()}-gateway"
-            ]
-            
-            for container_name in container_names:
-                logs = self.docker_service.get_container_logs(container_name, lines)
-                if "not found" not in logs.lower():
-                    return logs
+            container_ref = self.docker_service.resolve_gateway(name)
+            if not container_ref:
+                return f"Gateway {name} container not found"
             
-            return f"Gateway {name} container not found"
+            return self.docker_service.get_container_logs(container_ref, lines)
             
         except Exception as e:
             logger.error("Failed to get gateway logs", name=name, error=str(e))
             return f"Failed to get logs: {str(e)}"
     
-    def check_gateway_health(self, port: int) -> Dict:
-        """Check gateway health via HTTP"""
-        cache_key = f"health_{port}"
-        
-        # Check cache first
-        if cache_key in self._status_cache:
-            cached_time, cached_data = self._status_cache[cache_key]
-            if time.time() - cached_time < self._cache_duration:
-                return cached_data
+    def stream_gateway_logs(self, name: str, since: Optional[int] = None, until: Optional[int] = None,
+                            follow: bool = True, tail: Optional[Union[int, str]] = None,
+                            heartbeat: Optional[float] = None):
+        """Log lines of a gateway container as they are written, or None if the gateway is unknown"""
+        container_ref = self.docker_service.resolve_gateway(name)
+        if not container_ref:
+            return None
         
+        # A resumed stream continues from its cursor rather than re-sending the tail
+        if since is None and tail is None:
+            tail = Config.LOG_STREAM_TAIL
+        return self.docker_service.stream_container_logs(
+            container_ref, since=since, until=until, follow=follow, tail=tail if tail is not None else 'all',
+            heartbeat=heartbeat
+        )
+    
+    def invalidate_gateway_cache(self, port: int):
+        """Forget cached probe results for the gateway on a web port"""
+        for prefix in ('health', 'trial'):
+            self._status_cache.pop(f"{prefix}_{port}")
+    
+    def reset_trial_tracking(self, port: int):
+        """Re-read a gateway's trial on the next refresh, e.g. after a trial reset"""
+        self.trial_clock.invalidate(port)
+        self.scheduler.make_due(port, TRIAL)
+        self._status_cache.pop(f"trial_{port}")
+    
+    def _on_container_event(self, gateway_name: str, action: str, container: Dict):
+        """Invalidate a gateway's cached status when its container changes state"""
+        web_port = container.get('gateway_info', {}).get('web_port')
+        if web_port:
+            self.invalidate_gateway_cache(web_port)
+            if action in ('start', 'restart'):
+                # The trial clock does not run while the gateway is down
+                self.scheduler.mark_restarted(web_port)
+                self.trial_clock.invalidate(web_port)
+                with self._breakers_lock:
+                    self._breakers.pop(web_port, None)
+            logger.info("Gateway status cache invalidated", gateway=gateway_name, action=action, port=web_port)
+    
+    def _breaker_for(self, port: int) -> CircuitBreaker:
+        """Get the circuit breaker guarding probes of the gateway on a web port"""
+        with self._breakers_lock:
+            breaker = self._breakers.get(port)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    f"gateway_{port}",
+                    failure_threshold=Config.GATEWAY_FAILURE_THRESHOLD,
+                    base_delay=Config.GATEWAY_BREAKER_BASE_DELAY,
+                    max_delay=Config.GATEWAY_BREAKER_MAX_DELAY
+                )
+                self._breakers[port] = breaker
+            return breaker
+    
+    def _on_shared_probe_result(self, cache_key: str, result: Dict):
+        """Advance this worker's schedule for a probe another worker made"""
+        if not _is_probed_result(result):
+            return
+        kind, port = cache_key.split('_', 1)
+        port = int(port)
+        if kind == 'health':
+            self.scheduler.record(port, LIVENESS, result)
+        elif kind == 'trial':
+            drifted = self.trial_clock.observe(port, result)
+            self.scheduler.record(port, TRIAL, result, urgent=drifted)
+    
+    def check_gateway_health(self, port: int, allow_stale: bool = True) -> Dict:
+        """Check gateway liveness via the lightweight StatusPing endpoint"""
+        return self._status_cache.get_or_load(
+            f"health_{port}",
+            lambda: self._probe_gateway_health(port),
+            use_cached=not self.scheduler.is_due(port, LIVENESS),
+            allow_stale=allow_stale
+        )
+    
+    def _probe_gateway_health(self, port: int) -> Dict:
+        """Request StatusPing from a gateway and schedule its next liveness probe"""
         health_info = {
             'status': 'unknown',
             'response_time': None,
@@ -140,19 +283,27 @@ class GatewayService:
             'last_check': datetime.utcnow().isoformat()
         }
         
+        breaker = self._breaker_for(port)
+        if not breaker.allow_request():
+            # Answer at once instead of waiting out the timeout again
+            PROBES_SHORT_CIRCUITED.labels(tier='liveness').inc()
+            health_info['status'] = 'unhealthy'
+            self.scheduler.record(port, LIVENESS, health_info)
+            return health_info
+        
+        start_time = time.time()
+        reachable = False
         try:
-            start_time = time.time()
-            
-            # Try to access the gateway web interface
-            url = f"http://{self.host_ip}:{port}/main/system/gateway/status"
-            response = requests.get(url, timeout=10)
+            response = self.session_pool.get(self.host_ip, port, STATUS_PING_PATH)
+            reachable = True
             
-            response_time = (time.time() - start_time) * 1000  # Convert to ms
+            # Time from sending the request to parsing the response headers
+            response_time = response.elapsed.total_seconds() * 1000  # Convert to ms
             health_info['response_time'] = round(response_time, 2)
             
             if response.status_code == 200:
-                health_info['status'] = 'healthy'
-                health_info['accessible'] = True
+                health_info['status'] = self._status_from_ping(response)
+                health_info['accessible'] = health_info['status'] == 'healthy'
             elif response.status_code in [401, 403]:
                 # Gateway is running but requires authentication
                 health_info['status'] = 'healthy'
@@ -160,78 +311,113 @@ class GatewayService:
             else:
                 health_info['status'] = 'unhealthy'
                 
-        except requests.exceptions.Timeout:
-            health_info['status'] = 'starting'
-        except requests.exceptions.ConnectionError:
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+            # A starting gateway answers StatusPing with STARTING, so no
+            # answer at all means it is not reachable
             health_info['status'] = 'unhealthy'
         except Exception as e:
             logger.warning("Health check failed", port=port, error=str(e))
             health_info['status'] = 'unknown'
+        finally:
+            PROBE_TIER_DURATION.labels(tier='liveness').observe(time.time() - start_time)
+        
+        if reachable:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+            if breaker.is_open:
+                logger.warning("Gateway circuit open", port=port, **breaker.to_dict())
         
-        # Cache the result
-        self._status_cache[cache_key] = (time.time(), health_info)
+        # The result is cached until the scheduler says it is due again
+        self.scheduler.record(port, LIVENESS, health_info)
         return health_info
     
-    def get_trial_information(self, port: int) -> Optional[Dict]:
-        """Get trial information from gateway web interface"""
-        cache_key = f"trial_{port}"
+    def _status_from_ping(self, response) -> str:
+        """Map a StatusPing response body to a gateway status"""
+        try:
+            state = str(response.json().get('state', '')).upper()
+        except ValueError:
+            # Older gateways answer with plain text; reaching them is enough
+            return 'healthy'
+        return STATUS_PING_STATES.get(state, 'unhealthy')
+    
+    def get_trial_information(self, port: int, allow_stale: bool = True) -> Optional[Dict]:
+        """Get trial information, scraping the gateway status page only when a scrape is due"""
+        scrape_due = self.scheduler.is_due(port, TRIAL)
+        
+        # Between scheduled scrapes the countdown is extrapolated from the
+        # last reading instead of downloading the status page again
+        if not scrape_due:
+            predicted = self.trial_clock.predict(port)
+            if predicted:
+                return predicted
         
-        # Check cache first
-        if cache_key in self._status_cache:
-            cached_time, cached_data = self._status_cache[cache_key]
-            if time.time() - cached_time < self._cache_duration * 2:  # Cache trial info longer
-                return cached_data
+        return self._status_cache.get_or_load(
+            f"trial_{port}",
+            lambda: self._scrape_trial_information(port),
+            use_cached=not scrape_due,
+            allow_stale=allow_stale
+        )
+    
+    def _scrape_trial_information(self, port: int) -> Dict:
+        """Read trial information from the gateway status page, falling back to mock data"""
+        breaker = self._breaker_for(port)
+        if breaker.state != CircuitBreaker.CLOSED:
+            # Liveness probes carry the half-open trial; keep the last reading meanwhile
+            PROBES_SHORT_CIRCUITED.labels(tier='trial').inc()
+            self.scheduler.record(port, TRIAL, None)
+            last_reading = self._status_cache.get(f"trial_{port}")
+            return dict(last_reading, fallback=True) if last_reading else self._generate_mock_trial_info(port)
         
+        start_time = time.time()
         try:
-            # Try to access the gateway status page
-            url = f"http://{self.host_ip}:{port}/main/system/gateway/status"
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                trial_info = self._parse_trial_info_from_html(response.text)
+            # Stream the status page and stop reading at the first trial
+            # marker (or the size cap) instead of downloading all of it
+            with self.session_pool.get(self.host_ip, port, STATUS_PAGE_PATH, stream=True) as response:
+                breaker.record_success()
+                trial_info = None
+                if response.status_code == 200:
+                    trial_info = extract_trial_info_from_stream(
+                        response.iter_content(chunk_size=16384),
+                        encoding=response.encoding
+                    )
                 if trial_info:
-                    # Cache the result
-                    self._status_cache[cache_key] = (time.time(), trial_info)
+                    # Re-anchor the trial clock; a reading that disagrees
+                    # with the prediction is re-checked sooner
+                    drifted = self.trial_clock.observe(port, trial_info)
+                    self.scheduler.record(port, TRIAL, trial_info, urgent=drifted)
                     return trial_info
             
-            # If we can't get real data, return mock data for development
-            mock_trial = self._generate_mock_trial_info(port)
-            self._status_cache[cache_key] = (time.time(), mock_trial)
-            return mock_trial
-            
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            breaker.record_failure()
+            logger.warning("Failed to get trial information", port=port, error=str(e))
         except Exception as e:
             logger.warning("Failed to get trial information", port=port, error=str(e))
-            # Return mock data on error
-            mock_trial = self._generate_mock_trial_info(port)
-            self._status_cache[cache_key] = (time.time(), mock_trial)
-            return mock_trial
+        finally:
+            PROBE_TIER_DURATION.labels(tier='trial').observe(time.time() - start_time)
+        
+        # If we can't get real data, return mock data for development
+        mock_trial = self._generate_mock_trial_info(port)
+        self.scheduler.record(port, TRIAL, None)
+        return mock_trial
     
-    def _process_gateway_container(self, container: Dict) -> Dict:
-        """Process a container and extract gateway information"""
+    def _process_gateway_container(self, container: Dict, allow_stale: bool = True) -> Dict:
+        """Process a container and extract gateway information
+        
+        allow_stale=False probes due gateways before returning, for the
+        snapshot refresher and deadline-bounded requests.
+        """
         try:
-            gateway_info = container.get('gateway_info', {})
-            web_port = gateway_info.get('web_port')
-            
-            gateway_data = {
-                'name': gateway_info.get('name', container['name']),
-                'port': web_port,
-                'container_status': container['status'],
-                'container_health': container['health'],
-                'container_id': container['id'],
-                'image': container['image'],
-                'created': container['created']
-            }
+            gateway_data = self._gateway_from_container(container)
+            web_port = gateway_data['port']
             
             # Get real-time health and trial info if port is available
             if web_port:
-                health_info = self.check_gateway_health(web_port)
-                gateway_data['status'] = health_info['status']
-                gateway_data['accessible'] = health_info['accessible']
-                gateway_data['response_time'] = health_info['response_time']
-                gateway_data['last_check'] = health_info['last_check']
+                health_info = self.check_gateway_health(web_port, allow_stale=allow_stale)
+                self._apply_health(gateway_data, health_info)
                 
                 # Get trial information
-                trial_info = self.get_trial_information(web_port)
+                trial_info = self.get_trial_information(web_port, allow_stale=allow_stale)
                 gateway_data['trial'] = trial_info
             else:
                 gateway_data['status'] = 'unknown'
@@ -243,56 +429,56 @@ class GatewayService:
             logger.error("Failed to process gateway container", container=container.get('name'), error=str(e))
             return None
     
-    def _parse_trial_info_from_html(self, html_content: str) -> Optional[Dict]:
-        """Parse trial information from Ignition status page HTML"""
-        try:
-            # This is a simplified parser - in reality, you'd need to handle
-            # the specific HTML structure of Ignition's status page
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # Look for trial-related text patterns
-            trial_patterns = [
-                r'trial.*?(\d+)\s*days?\s*remaining',
-                r'(\d+)\s*hours?\s*remaining',
-                r'trial.*?expires?\s*in\s*(\d+)'
-            ]
-            
-            text_content = soup.get_text().lower()
-            
-            for pattern in trial_patterns:
-                match = re.search(pattern, text_content)
-                if match:
-                    remaining = int(match.group(1))
-                    
-                    if 'day' in match.group(0):
-                        remaining_hours = remaining * 24
-                        display = f"{remaining} day{'s' if remaining != 1 else ''}"
-                    else:
-                        remaining_hours = remaining
-                        display = f"{remaining} hour{'s' if remaining != 1 else ''}"
-                    
-                    return {
-                        'remaining_hours': remaining_hours,
-                        'remaining_display': display,
-                        'expired': False,
-                        'emergency': remaining_hours < 24,
-                        'trial_state': 'TRIAL'
-                    }
-            
-            # Check for expired trial
-            if 'expired' in text_content or 'emergency' in text_content:
-                return {
-                    'remaining_hours': 0,
-                    'remaining_display': 'Expired',
-                    'expired': True,
-                    'emergency': True,
-                    'trial_state': 'EXPIRED'
-                }
-            
-        except Exception as e:
-            logger.warning("Failed to parse trial info from HTML", error=str(e))
+    def _last_known_gateway(self, container: Dict, deadline: Deadline) -> Dict:
+        """Gateway information from cached probe results, for a gateway whose probe missed the deadline"""
+        deadline.mark_exceeded()
+        gateway_data = self._gateway_from_container(container)
+        web_port = gateway_data['port']
+        
+        health_info = self._status_cache.get(f"health_{web_port}") if web_port else None
+        if health_info:
+            self._apply_health(gateway_data, health_info)
+            gateway_data['stale'] = True
+        else:
+            # Never probed yet; the probe keeps running in the background
+            gateway_data['status'] = 'pending'
+            gateway_data['accessible'] = False
+            gateway_data['response_time'] = None
+            gateway_data['last_check'] = None
+            gateway_data['pending'] = True
         
-        return None
+        if web_port:
+            gateway_data['trial'] = self.trial_clock.predict(web_port) or self._status_cache.get(f"trial_{web_port}")
+        else:
+            gateway_data['trial'] = None
+        return gateway_data
+    
+    def _gateway_from_container(self, container: Dict) -> Dict:
+        """Gateway fields that come from the container alone"""
+        gateway_info = container.get('gateway_info', {})
+        return {
+            'name': gateway_info.get('name', container['name']),
+            'port': gateway_info.get('web_port'),
+            'container_status': container['status'],
+            'container_health': container['health'],
+            'container_id': container['id'],
+            'image': container['image'],
+            'created': container['created']
+        }
+    
+    def _apply_health(self, gateway_data: Dict, health_info: Dict):
+        """Copy a liveness result, the probe schedule and the circuit state into gateway data"""
+        web_port = gateway_data['port']
+        gateway_data['status'] = health_info['status']
+        gateway_data['accessible'] = health_info['accessible']
+        gateway_data['response_time'] = health_info['response_time']
+        gateway_data['last_check'] = health_info['last_check']
+        gateway_data['stale'] = health_info.get('stale', False)
+        gateway_data['schedule'] = self.scheduler.describe(web_port)
+        
+        circuit = self._breaker_for(web_port).to_dict()
+        gateway_data['circuit_open'] = circuit['state'] != CircuitBreaker.CLOSED
+        gateway_data['next_attempt'] = circuit['next_attempt']
     
     def _generate_mock_trial_info(self, port: int) -> Dict:
         """Generate mock trial information for development/testing"""
@@ -314,7 +500,8 @@ class GatewayService:
             'remaining_display': config['display'],
             'expired': config.get('expired', False),
             'emergency': config['emergency'],
-            'trial_state': 'EXPIRED' if config.get('expired') else 'TRIAL'
+            'trial_state': 'EXPIRED' if config.get('expired') else 'TRIAL',
+            'mock': True
         }
     
     def _get_mock_gateways(self) -> List[Dict]:
@@ -414,58 +601,138 @@ class GatewayService:
                 'target': target_gateway
             }
     
-    def test_all_connections(self) -> List[Dict]:
-        """Test all configured gateway-to-gateway connections"""
+    def probe_gateway_network(self) -> Dict:
+        """Probe every configured gateway from the backend over the gateway network"""
+        targets = targets_from_registry(self.docker_service.config_registry)
+        
+        start_ns = time.perf_counter_ns()
+        results = NetworkProber().probe_all(targets)
+        wall_time_ms = round((time.perf_counter_ns() - start_ns) / 1_000_000, 3)
+        
+        reachable = sum(1 for result in results if result['success'])
+        logger.info("Probed gateway network", targets=len(results), reachable=reachable, wall_time_ms=wall_time_ms)
+        return {
+            'results': results,
+            'total': len(results),
+            'reachable': reachable,
+            'wall_time_ms': wall_time_ms,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+    
+    def get_configured_connections(self) -> List[Dict]:
+        """Gateway-to-gateway links covered by connectivity tests"""
+        return self._get_configured_connections()
+    
+    def test_all_connections(self, batched: bool = False, connections: Optional[List[Dict]] = None) -> List[Dict]:
+        """Test all configured gateway-to-gateway connections, or only the given ones"""
         try:
-            connections = self._get_configured_connections()
-            results = []
-            
-            for connection in connections:
-                result = self.ping_gateway(connection['source'], connection['target'])
-                results.append(result)
+            if connections is None:
+                connections = self._get_configured_connections()
+            if batched:
+                results = self._test_connections_batched(connections)
+            else:
+                results = []
+                for connection in connections:
+                    result = self.ping_gateway(connection['source'], connection['target'])
+                    results.append(result)
             
-            logger.info("Tested all gateway connections", total_tests=len(results))
+            logger.info("Tested all gateway connections", total_tests=len(results), batched=batched)
             return results
             
         except Exception as e:
             logger.error("Failed to test all connections", error=str(e))
             return []
     
-    def _get_gateway_config(self, gateway_name: str) -> Optional[Dict]:
-        """Get gateway configuration from env files"""
-        try:
-            env_file_path = f"/opt/firebox/config/gateways/{gateway_name}.env"
-            
-            # Read the environment file
-            import os
-            if not os.path.exists(env_file_path):
-                logger.warning("Gateway config file not found", gateway=gateway_name, path=env_file_path)
-                return None
-            
-            config = {}
-            with open(env_file_path, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#') and '=' in line:
-                        key, value = line.split('=', 1)
-                        config[key] = value
-            
-            # Extract relevant information
-            return {
-                'name': gateway_name,
-                'hostname': config.get('CONTAINER_HOSTNAME', gateway_name.lower()),
-                'http_port': config.get('HTTP_PORT'),
-                'service_name': config.get('SERVICE_NAME', gateway_name.lower())
-            }
+    def _test_connections_batched(self, connections: List[Dict]) -> List[Dict]:
+        """Test connections with one exec per source gateway, running sources concurrently"""
+        results = {}
+        batches = OrderedDict()
+        for connection in connections:
+            source, target = connection['source'], connection['target']
+            target_info = self._get_gateway_config(target)
+            if not target_info:
+                results[(source, target)] = {
+                    'success': False,
+                    'error': f'Target gateway {target} not found',
+                    'source': source,
+                    'target': target
+                }
+                continue
+            batches.setdefault(source, []).append((target, target_info))
+        
+        batch_results = self.connectivity_executor.map(
+            lambda batch: self._test_source_connections(*batch),
+            list(batches.items()),
+            label=lambda batch: batch[0]
+        )
+        for source_results in batch_results:
+            for result in source_results or []:
+                results[(result['source'], result['target'])] = result
+        
+        return [results[(c['source'], c['target'])] for c in connections if (c['source'], c['target']) in results]
+    
+    def _test_source_connections(self, source_gateway: str, targets: List[tuple]) -> List[Dict]:
+        """Test every target of one source gateway in parallel inside a single exec"""
+        source_container = self.docker_service.resolve_gateway(source_gateway) or f"ignition-sandbox_{source_gateway.lower()}_1"
+        
+        script = CONNECTIVITY_SCRIPT
+        for target, target_info in targets:
+            target_host = target_info.get('hostname', target.lower())
+            target_port = target_info.get('http_port') or '8080'
+            script += f"probe {shlex.quote(target)} {shlex.quote(target_host)} {shlex.quote(str(target_port))} &\n"
+        script += "wait\n"
+        
+        exec_result = self.docker_service.exec_command(source_container, ['sh', '-c', script])
+        timestamp = datetime.utcnow().isoformat()
+        
+        measured = {}
+        for line in exec_result.get('output', '').splitlines():
+            parts = line.split()
+            if len(parts) == 3:
+                measured[parts[0]] = (parts[1], parts[2])
+        
+        results = []
+        for target, target_info in targets:
+            method, elapsed_us = measured.get(target, (None, None))
+            success = method not in (None, 'none')
+            if success:
+                error = None
+            elif method == 'none':
+                error = 'All connectivity tests failed'
+            else:
+                error = exec_result.get('error') or 'No result from connectivity script'
             
-        except Exception as e:
-            logger.error("Failed to get gateway config", gateway=gateway_name, error=str(e))
+            results.append({
+                'success': success,
+                'source': source_gateway,
+                'target': target,
+                'target_host': target_info.get('hostname', target.lower()),
+                'target_port': target_info.get('http_port'),
+                'response_time': round(int(elapsed_us) / 1000, 2) if elapsed_us and elapsed_us.isdigit() else None,
+                'method': method if success else 'multiple',
+                'timestamp': timestamp,
+                'error': error
+            })
+        return results
+    
+    def _get_gateway_config(self, gateway_name: str) -> Optional[Dict]:
+        """Get gateway configuration from the parsed env files"""
+        config = self.docker_service.config_registry.get(gateway_name)
+        if config is None:
+            logger.warning("Gateway config not found", gateway=gateway_name)
             return None
+        
+        return {
+            'name': gateway_name,
+            'hostname': config.get('CONTAINER_HOSTNAME', gateway_name.lower()),
+            'http_port': config.get('HTTP_PORT'),
+            'service_name': config.get('SERVICE_NAME', gateway_name.lower())
+        }
     
     def _test_docker_connectivity(self, source_gateway: str, target_gateway: str, target_info: Dict) -> Dict:
         """Test connectivity using Docker exec commands"""
         try:
-            source_container = f"ignition-sandbox_{source_gateway.lower()}_1"
+            source_container = self.docker_service.resolve_gateway(source_gateway) or f"ignition-sandbox_{source_gateway.lower()}_1"
             target_host = target_info.get('hostname', target_gateway.lower())
             target_port = target_info.get('http_port', '8080')
             
@@ -525,28 +792,5 @@ class GatewayService:
             }
     
     def _get_configured_connections(self) -> List[Dict]:
-        """Get all configured gateway connections from env files"""
-        connections = []
-        
-        # Define the expected connections based on the configuration
-        expected_connections = [
-            # VIGVIS connects to all others
-            {'source': 'VIGVIS', 'target': 'CVSIGDT1'},
-            {'source': 'VIGVIS', 'target': 'CVSIGDT2'},
-            {'source': 'VIGVIS', 'target': 'VIGDS3'},
-            {'source': 'VIGVIS', 'target': 'VIGDS4'},
-            {'source': 'VIGVIS', 'target': 'VIGDEV'},
-            {'source': 'VIGVIS', 'target': 'VIGSVC'},
-            
-            # Development and Service connect to VIGVIS
-            {'source': 'VIGDEV', 'target': 'VIGVIS'},
-            {'source': 'VIGSVC', 'target': 'VIGVIS'},
-            
-            # Data collection gateways connect to Service
-            {'source': 'CVSIGDT1', 'target': 'VIGSVC'},
-            {'source': 'CVSIGDT2', 'target': 'VIGSVC'},
-            {'source': 'VIGDS3', 'target': 'VIGSVC'},
-            {'source': 'VIGDS4', 'target': 'VIGSVC'},
-        ]
-        
-        return expected_connections
\ No newline at end of file
+        """Get all configured gateway connections from the GATEWAY_NETWORK_* entries in the env files"""
+        return self.docker_service.config_registry.connections()
\ No newline at end of file
@@ -0,0 +1,100 @@
+import threading
+from typing import Dict, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from prometheus_client import Counter
+from config import Config
+from utils import get_logger
+
+logger = get_logger('http_pool')
+
+# Prometheus metrics
+SESSIONS_CREATED = Counter('gateway_http_sessions_created_total', 'Keep-alive HTTP sessions opened per gateway', ['gateway'])
+
+class GatewaySessionPool:
+    """Persistent keep-alive HTTP sessions, one per gateway host:port"""
+    
+    def __init__(self, pool_size: Optional[int] = None, connect_timeout: Optional[float] = None,
+                 read_timeout: Optional[float] = None, retries: Optional[int] = None,
+                 backoff_factor: Optional[float] = None):
+        self.pool_size = pool_size or Config.GATEWAY_POOL_SIZE
+        self.read_timeout = read_timeout or Config.GATEWAY_TIMEOUT
+        self.connect_timeout = min(connect_timeout or Config.GATEWAY_CONNECT_TIMEOUT, self.read_timeout)
+        self.retries = Config.GATEWAY_PROBE_RETRIES if retries is None else retries
+        self.backoff_factor = Config.GATEWAY_PROBE_BACKOFF if backoff_factor is None else backoff_factor
+        
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        """(connect, read) timeout passed to every request"""
+        return (self.connect_timeout, self.read_timeout)
+    
+    def session_for(self, host: str, port: int) -> requests.Session:
+        """Get the keep-alive session for a gateway, creating it on first use"""
+        key = f"{host}:{port}"
+        session = self._sessions.get(key)
+        if session is not None:
+            return session
+        
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._create_session()
+                self._sessions[key] = session
+                SESSIONS_CREATED.labels(gateway=key).inc()
+                logger.info("Gateway HTTP session created", gateway=key, pool_size=self.pool_size)
+        return session
+    
+    def get(self, host: str, port: int, path: str, **kwargs) -> requests.Response:
+        """GET a path on a gateway over its pooled session"""
+        kwargs.setdefault('timeout', self.timeout)
+        url = f"http://{host}:{port}{path}"
+        return self.session_for(host, port).get(url, **kwargs)
+    
+    def close(self):
+        """Close every pooled session"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+    
+    def _create_session(self) -> requests.Session:
+        """Build a session whose adapter keeps connections alive and retries connect failures"""
+        retry = Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=0,
+            status=self.retries,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            backoff_factor=self.backoff_factor,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+            max_retries=retry,
+            pool_block=False
+        )
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update({'Connection': 'keep-alive'})
+        return session
+
+# Shared pool so every service reuses the same gateway connections
+_session_pool = None
+_session_pool_lock = threading.Lock()
+
+def get_session_pool() -> GatewaySessionPool:
+    """Get the process-wide gateway session pool"""
+    global _session_pool
+    
+    if _session_pool is None:
+        with _session_pool_lock:
+            if _session_pool is None:
+                _session_pool = GatewaySessionPool()
+    return _session_pool
@@ -0,0 +1,163 @@
+import re
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, FrozenSet, List, Optional
+import docker
+from config import Config
+from utils import get_logger, Deadline
+
+logger = get_logger('log_search')
+
+# Plain level words, or the single-letter level Ignition's JVM lines carry
+# after the wrapper prefix, e.g. "INFO   | jvm 1 | 2024/05/01 ... | W [Gateway] ..."
+LEVEL_PATTERN = re.compile(r'\b(TRACE|DEBUG|INFO|WARN(?:ING)?|ERROR|SEVERE|FATAL)\b')
+IGNITION_LEVEL_PATTERN = re.compile(r'\|\s([TDIWE])\s\[')
+IGNITION_LEVELS = {'T': 'TRACE', 'D': 'DEBUG', 'I': 'INFO', 'W': 'WARN', 'E': 'ERROR'}
+LEVEL_ALIASES = {'WARNING': 'WARN', 'SEVERE': 'ERROR'}
+
+def detect_level(text: str) -> Optional[str]:
+    """Log level of a line, preferring Ignition's own level over the wrapper's"""
+    match = IGNITION_LEVEL_PATTERN.search(text)
+    if match:
+        return IGNITION_LEVELS[match.group(1)]
+    match = LEVEL_PATTERN.search(text)
+    if match:
+        return LEVEL_ALIASES.get(match.group(1), match.group(1))
+    return None
+
+class _SearchState:
+    """Matches and read position for one gateway and query, extended by each search"""
+    
+    def __init__(self, origin: Optional[int], context: int):
+        self.origin = origin
+        self.cursor: Optional[int] = None
+        # Without an origin the first read is only the log's tail, so the
+        # state covers nothing before the first line it read
+        self.first_read: Optional[int] = None
+        self.matches = deque(maxlen=Config.LOG_SEARCH_MAX_MATCHES)
+        self.dropped = 0
+        # Context is carried between scans, so a match on the last line read
+        # still gets its following lines from the next scan
+        self.before = deque(maxlen=context)
+        self.pending: List[list] = []
+        self.lock = threading.Lock()
+    
+    def covers(self, since: Optional[int]) -> bool:
+        """Whether this state has read everything a search from since needs"""
+        if since is None:
+            return self.origin is None
+        start = self.origin if self.origin is not None else self.first_read
+        return start is not None and since >= start
+
+class LogSearch:
+    """Regex, level and time-range search over gateway container logs"""
+    
+    def __init__(self, gateway_service):
+        self.gateway_service = gateway_service
+        self._states: 'OrderedDict[tuple, _SearchState]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def search(self, gateway_name: str, pattern: Optional[str] = None, levels: FrozenSet[str] = frozenset(),
+               since: Optional[int] = None, until: Optional[int] = None, context: int = 0) -> Optional[Dict]:
+        """Find matching lines, reading only log data newer than this query's last search
+        
+        Returns matches newest first, or None when the gateway is unknown.
+        since and until are epoch nanoseconds. Raises ValueError for a bad pattern.
+        A search that runs out of its line or time budget returns the cursor it
+        stopped at; searching again continues from there.
+        """
+        try:
+            regex = re.compile(pattern) if pattern else None
+        except re.error as e:
+            raise ValueError(f'Invalid pattern: {e}')
+        context = max(0, min(context, Config.LOG_SEARCH_MAX_CONTEXT))
+        levels = frozenset(LEVEL_ALIASES.get(level.upper(), level.upper()) for level in levels)
+        
+        state = self._state_for((gateway_name.upper(), pattern, levels, context), since, context)
+        deadline = Deadline(Config.LOG_SEARCH_MAX_MS)
+        with state.lock:
+            incremental = state.cursor is not None
+            start = state.cursor if incremental else state.origin
+            # Without a start, the first search reads the recent tail rather than the whole log
+            tail = Config.LOG_SEARCH_TAIL if start is None else 'all'
+            lines = self.gateway_service.stream_gateway_logs(gateway_name, since=start, follow=False, tail=tail)
+            if lines is None:
+                return None
+            
+            lines_read = 0
+            stopped_at = None
+            try:
+                for timestamp, cursor, text in lines:
+                    lines_read += 1
+                    if state.first_read is None:
+                        state.first_read = cursor
+                    self._scan_line(state, regex, levels, timestamp, cursor, text)
+                    state.cursor = cursor
+                    if lines_read >= Config.LOG_SEARCH_MAX_LINES or deadline.expired:
+                        stopped_at = timestamp
+                        break
+            except docker.errors.NotFound:
+                # A name not in the inventory resolves to a configured container that may not exist
+                logger.warning("Gateway container not found", gateway=gateway_name)
+                return None
+            finally:
+                lines.close()
+            
+            # Copies, since later searches keep adding after-context to the stored matches
+            matches = [
+                dict(match, before=list(match['before']), after=list(match['after']))
+                for match in reversed(state.matches)
+                if (since is None or match['cursor'] > since) and (until is None or match['cursor'] <= until)
+            ]
+            dropped = state.dropped
+        
+        logger.info("Searched gateway logs", gateway=gateway_name, pattern=pattern, lines_read=lines_read,
+                    incremental=incremental, matches=len(matches), stopped_at=stopped_at)
+        return {
+            'matches': matches,
+            'lines_read': lines_read,
+            'incremental': incremental,
+            'truncated': dropped > 0 or stopped_at is not None,
+            'cursor': stopped_at
+        }
+    
+    def _state_for(self, key: tuple, since: Optional[int], context: int) -> _SearchState:
+        """Reuse the query's state unless it started after the requested range"""
+        with self._lock:
+            state = self._states.get(key)
+            if state is not None and state.covers(since):
+                self._states.move_to_end(key)
+                return state
+            
+            state = _SearchState(since, context)
+            self._states[key] = state
+            self._states.move_to_end(key)
+            while len(self._states) > Config.LOG_SEARCH_MAX_CURSORS:
+                self._states.popitem(last=False)
+            return state
+    
+    def _scan_line(self, state: _SearchState, regex, levels: FrozenSet[str], timestamp: str, cursor: int, text: str):
+        """Feed one line through after-context collection, matching and before-context"""
+        if state.pending:
+            for pending in state.pending:
+                pending[0]['after'].append(text)
+                pending[1] -= 1
+            state.pending = [pending for pending in state.pending if pending[1] > 0]
+        
+        if (regex is None or regex.search(text)) and (not levels or detect_level(text) in levels):
+            match = {
+                'timestamp': timestamp,
+                'cursor': cursor,
+                'level': detect_level(text),
+                'line': text,
+                'before': list(state.before),
+                'after': []
+            }
+            if len(state.matches) == state.matches.maxlen:
+                state.dropped += 1
+            state.matches.append(match)
+            if state.before.maxlen:
+                state.pending.append([match, state.before.maxlen])
+        
+        if state.before.maxlen:
+            state.before.append(text)
@@ -0,0 +1,126 @@
+import asyncio
+import socket
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from prometheus_client import Histogram
+from config import Config
+
+# Prometheus metrics
+NETWORK_PROBE_DURATION = Histogram(
+    'gateway_network_probe_seconds',
+    'Backend-to-gateway probe time over the gateway network, by phase',
+    ['phase'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
+@dataclass(frozen=True)
+class ProbeTarget:
+    """A gateway endpoint reachable from the backend over the gateway network"""
+    name: str
+    host: str
+    port: int
+    path: str = '/StatusPing'
+
+def _elapsed_ms(start_ns: int) -> float:
+    return round((time.perf_counter_ns() - start_ns) / 1_000_000, 3)
+
+class NetworkProber:
+    """Probes many gateway endpoints concurrently with raw TCP connects and minimal HTTP requests"""
+    
+    def __init__(self, timeout: Optional[float] = None, concurrency: Optional[int] = None):
+        self.timeout = timeout or Config.GATEWAY_CONNECT_TIMEOUT
+        self.concurrency = max(1, concurrency or Config.NETWORK_PROBE_CONCURRENCY)
+    
+    def probe_all(self, targets: List[ProbeTarget]) -> List[Dict]:
+        """Probe every target at once, returning results in target order"""
+        if not targets:
+            return []
+        return asyncio.run(self._probe_all(targets))
+    
+    async def _probe_all(self, targets: List[ProbeTarget]) -> List[Dict]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        return await asyncio.gather(*(self._probe(target, semaphore) for target in targets))
+    
+    async def _probe(self, target: ProbeTarget, semaphore: asyncio.Semaphore) -> Dict:
+        """Resolve, connect and read the HTTP status line, timing each phase in milliseconds"""
+        result = {
+            'target': target.name,
+            'host': target.host,
+            'port': target.port,
+            'success': False,
+            'connected': False,
+            'resolve_ms': None,
+            'connect_ms': None,
+            'http_ms': None,
+            'http_status': None,
+            'error': None
+        }
+        
+        async with semaphore:
+            loop = asyncio.get_running_loop()
+            writer = None
+            phase = 'resolve'
+            try:
+                start_ns = time.perf_counter_ns()
+                addresses = await asyncio.wait_for(
+                    loop.getaddrinfo(target.host, target.port, type=socket.SOCK_STREAM),
+                    self.timeout
+                )
+                result['resolve_ms'] = _elapsed_ms(start_ns)
+                family, _, _, _, address = addresses[0]
+                
+                # Connect to the resolved address so DNS time is not counted twice
+                phase = 'connect'
+                start_ns = time.perf_counter_ns()
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(address[0], address[1], family=family),
+                    self.timeout
+                )
+                result['connect_ms'] = _elapsed_ms(start_ns)
+                result['connected'] = True
+                
+                phase = 'http'
+                start_ns = time.perf_counter_ns()
+                writer.write(
+                    f"GET {target.path} HTTP/1.1\r\nHost: {target.host}:{target.port}\r\n"
+                    f"Connection: close\r\n\r\n".encode('ascii')
+                )
+                await writer.drain()
+                status_line = await asyncio.wait_for(reader.readline(), self.timeout)
+                result['http_ms'] = _elapsed_ms(start_ns)
+                
+                # A peer that accepts and then closes is reachable but not serving HTTP
+                parts = status_line.split()
+                if len(parts) >= 2 and parts[0].startswith(b'HTTP/') and parts[1].isdigit():
+                    result['http_status'] = int(parts[1])
+                    result['success'] = True
+                else:
+                    result['error'] = 'http failed: no status line'
+            
+            except asyncio.TimeoutError:
+                result['error'] = f'{phase} timed out'
+            except OSError as e:
+                result['error'] = f'{phase} failed: {e}'
+            finally:
+                if writer is not None:
+                    writer.close()
+                    try:
+                        await writer.wait_closed()
+                    except OSError:
+                        pass
+        
+        for phase_name in ('resolve', 'connect', 'http'):
+            if result[f'{phase_name}_ms'] is not None:
+                NETWORK_PROBE_DURATION.labels(phase=phase_name).observe(result[f'{phase_name}_ms'] / 1000)
+        return result
+
+def targets_from_registry(registry, port: Optional[int] = None) -> List[ProbeTarget]:
+    """Probe targets for every configured gateway, addressed by service name on the gateway network"""
+    port = port or Config.GATEWAY_INTERNAL_PORT
+    targets = []
+    for name in sorted(registry.names()):
+        values = registry.get(name) or {}
+        host = values.get('SERVICE_NAME') or values.get('CONTAINER_HOSTNAME') or name.lower()
+        targets.append(ProbeTarget(name=name, host=host, port=port))
+    return targets
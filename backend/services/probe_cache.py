@@ -0,0 +1,239 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from prometheus_client import Counter
+from config import Config
+from utils import get_logger
+
+logger = get_logger('probe_cache')
+
+# Prometheus metrics
+CACHE_REQUESTS = Counter(
+    'gateway_probe_cache_requests_total',
+    'Probe cache lookups by outcome (hit, miss, coalesced, stale, shared)',
+    ['cache', 'result']
+)
+CACHE_EVICTIONS = Counter(
+    'gateway_probe_cache_evictions_total',
+    'Probe cache entries evicted to stay within the size bound',
+    ['cache']
+)
+
+# How often a worker waiting on another worker's probe checks for its result
+SHARED_POLL_INTERVAL = 0.1
+
+class _Flight:
+    """One probe in progress that concurrent callers wait on"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+class ProbeCache:
+    """Bounded LRU cache of probe results with per-type TTLs, single-flight probes and stale-while-revalidate"""
+    
+    def __init__(self, name: str, ttls: Optional[Dict[str, float]] = None,
+                 max_entries: Optional[int] = None, stale_while_revalidate: Optional[bool] = None,
+                 shared=None, on_shared_result: Optional[Callable[[str, Any], None]] = None,
+                 shareable: Optional[Callable[[Any], bool]] = None):
+        self.name = name
+        # TTL per entry type, the key prefix before "_" (e.g. "health_8088")
+        self.ttls = ttls or {}
+        self.max_entries = max(1, max_entries or Config.GATEWAY_CACHE_MAX_ENTRIES)
+        self.stale_while_revalidate = (Config.GATEWAY_CACHE_STALE_WHILE_REVALIDATE
+                                       if stale_while_revalidate is None else stale_while_revalidate)
+        
+        # Optional store shared with other worker processes, so only one of
+        # them probes a key and the rest adopt its result
+        self.shared = shared
+        self.on_shared_result = on_shared_result
+        # Results failing this check (e.g. fallbacks) are never published or adopted
+        self.shareable = shareable or (lambda value: True)
+        
+        # key -> (stored monotonic time, stored wall time, value), least recently used first
+        self._entries: 'OrderedDict[str, Tuple[float, float, Any]]' = OrderedDict()
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self._counts = {'hit': 0, 'miss': 0, 'coalesced': 0, 'stale': 0, 'shared': 0, 'evicted': 0}
+        self._refresher = ThreadPoolExecutor(
+            max_workers=Config.GATEWAY_PROBE_WORKERS,
+            thread_name_prefix=f'{name}-refresh'
+        )
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Get a cached value without probing, regardless of its age"""
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry[2] if entry else None
+    
+    def set(self, key: str, value: Any):
+        """Store a value, e.g. one probed outside get_or_load"""
+        with self._lock:
+            self._store(key, value)
+    
+    def pop(self, key: str):
+        """Forget a cached value; a probe already in flight will not store its result"""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._flights.pop(key, None)
+        if self.shared is not None:
+            self.shared.delete(key)
+    
+    def get_or_load(self, key: str, loader: Callable[[], Any], use_cached: bool = True,
+                    allow_stale: bool = True) -> Any:
+        """Return the cached value while fresh, or run loader once for every caller that misses at the same time"""
+        # use_cached=False treats the entry as expired even within its TTL,
+        # e.g. when the probe scheduler says the gateway is due again.
+        # allow_stale=False waits for the probe even with stale-while-revalidate,
+        # for callers that already run off the request path or bound it themselves
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if use_cached and not self._expired(key, entry):
+                    self._count('hit')
+                    return entry[2]
+                
+                if self.stale_while_revalidate and allow_stale:
+                    # Serve the expired value now and refresh it in the background
+                    self._count('stale')
+                    if key not in self._flights:
+                        flight = _Flight()
+                        self._flights[key] = flight
+                        self._refresher.submit(self._revalidate, key, flight, loader)
+                    return self._mark_stale(entry[2])
+            
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+                self._count('miss')
+            else:
+                self._count('coalesced')
+        
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        
+        self._run(key, flight, loader)
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+    
+    def stats(self) -> Dict[str, int]:
+        """Lookup outcome and eviction counts since startup"""
+        with self._lock:
+            return dict(self._counts, size=len(self._entries), in_flight=len(self._flights))
+    
+    def _run(self, key: str, flight: _Flight, loader: Callable[[], Any]):
+        """Run the probe for a flight and publish its result to every waiter"""
+        try:
+            if self.shared is not None:
+                flight.value = self._load_shared(key, loader)
+            else:
+                flight.value = loader()
+        except BaseException as e:
+            flight.error = e
+        finally:
+            with self._lock:
+                # Only store the result if the key was not invalidated meanwhile
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                    if flight.error is None:
+                        self._store(key, flight.value)
+            flight.done.set()
+    
+    def _revalidate(self, key: str, flight: _Flight, loader: Callable[[], Any]):
+        """Background refresh of an expired entry that was served stale"""
+        self._run(key, flight, loader)
+        if flight.error is not None:
+            logger.warning("Background probe refresh failed", cache=self.name, key=key, error=str(flight.error))
+    
+    def _load_shared(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Adopt another worker's newer result, or probe under the shared lease"""
+        with self._lock:
+            entry = self._entries.get(key)
+        seen_at = entry[1] if entry else None
+        
+        adopted = self._adopt_shared(key, seen_at)
+        if adopted is not None:
+            return adopted
+        
+        if self.shared.claim(key):
+            return self._probe_and_publish(key, loader)
+        
+        # Another worker is probing this key; wait for its result rather than probing too
+        deadline = time.monotonic() + self.shared.lease_seconds
+        while time.monotonic() < deadline:
+            time.sleep(SHARED_POLL_INTERVAL)
+            adopted = self._adopt_shared(key, seen_at)
+            if adopted is not None:
+                return adopted
+            # The prober released its lease without publishing, so probe here
+            if self.shared.claim(key):
+                return self._probe_and_publish(key, loader)
+        
+        logger.warning("Shared probe lease expired without a result", cache=self.name, key=key)
+        return loader()
+    
+    def _probe_and_publish(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Probe under the shared lease, publishing the result if other workers may use it"""
+        try:
+            value = loader()
+        except BaseException:
+            self.shared.release(key)
+            raise
+        
+        if self.shareable(value):
+            self.shared.write(key, value)
+        else:
+            self.shared.release(key)
+        return value
+    
+    def _adopt_shared(self, key: str, seen_at: Optional[float]) -> Optional[Any]:
+        """A shared result newer than the one this process last saw, within its TTL"""
+        row = self.shared.read(key)
+        if row is None:
+            return None
+        
+        stored_at, value = row
+        ttl = self.ttls.get(key.split('_', 1)[0])
+        if seen_at is not None and stored_at <= seen_at:
+            return None
+        if ttl is not None and time.time() - stored_at >= ttl:
+            return None
+        if not self.shareable(value):
+            return None
+        
+        with self._lock:
+            self._count('shared')
+        if self.on_shared_result is not None:
+            self.on_shared_result(key, value)
+        return value
+    
+    def _store(self, key: str, value: Any):
+        self._entries[key] = (time.monotonic(), time.time(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counts['evicted'] += 1
+            CACHE_EVICTIONS.labels(cache=self.name).inc()
+    
+    def _expired(self, key: str, entry: Tuple[float, float, Any]) -> bool:
+        ttl = self.ttls.get(key.split('_', 1)[0])
+        return ttl is not None and time.monotonic() - entry[0] >= ttl
+    
+    def _mark_stale(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            return dict(value, stale=True)
+        return value
+    
+    def _count(self, result: str):
+        self._counts[result] += 1
+        CACHE_REQUESTS.labels(cache=self.name, result=result).inc()
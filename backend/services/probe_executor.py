@@ -0,0 +1,70 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, List, Optional, Sequence
+from prometheus_client import Histogram
+from config import Config
+from utils import get_logger
+
+logger = get_logger('probe_executor')
+
+# Prometheus metrics
+PROBE_DURATION = Histogram(
+    'gateway_probe_duration_seconds',
+    'Time spent probing a single gateway',
+    ['executor', 'gateway']
+)
+FANOUT_DURATION = Histogram(
+    'gateway_probe_fanout_duration_seconds',
+    'Time spent probing all gateways in one fan-out',
+    ['executor']
+)
+
+class ProbeExecutor:
+    """Runs gateway probes concurrently with a bounded number of workers"""
+    
+    def __init__(self, max_workers: Optional[int] = None, name: str = 'gateway-probe'):
+        self.name = name
+        self.max_workers = max(1, max_workers or Config.GATEWAY_PROBE_WORKERS)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix=name
+        )
+        logger.info("Probe executor initialized", name=name, max_workers=self.max_workers)
+    
+    def map(self, probe: Callable[[Any], Any], items: Sequence[Any],
+            label: Callable[[Any], str] = str, timeout: Optional[float] = None,
+            on_timeout: Optional[Callable[[Any], Any]] = None) -> List[Any]:
+        """Run probe(item) for every item concurrently, returning results in input order"""
+        # Probes still running after timeout seconds are left to finish in
+        # the background, and on_timeout(item) stands in for their result
+        if not items:
+            return []
+        
+        start_time = time.time()
+        futures = [self._executor.submit(self._timed, probe, item, label(item)) for item in items]
+        if timeout is not None:
+            wait(futures, timeout=timeout)
+        results = [
+            future.result() if timeout is None or future.done() else (on_timeout(item) if on_timeout else None)
+            for item, future in zip(items, futures)
+        ]
+        
+        duration = time.time() - start_time
+        FANOUT_DURATION.labels(executor=self.name).observe(duration)
+        logger.info("Probe fan-out completed", executor=self.name, probes=len(items), duration_ms=round(duration * 1000, 2))
+        return results
+    
+    def _timed(self, probe: Callable[[Any], Any], item: Any, name: str) -> Any:
+        """Run a single probe and record its duration"""
+        start_time = time.time()
+        try:
+            return probe(item)
+        except Exception as e:
+            logger.error("Gateway probe failed", gateway=name, error=str(e))
+            return None
+        finally:
+            PROBE_DURATION.labels(executor=self.name, gateway=name).observe(time.time() - start_time)
+    
+    def shutdown(self):
+        """Stop accepting new probes and release worker threads"""
+        self._executor.shutdown(wait=False)
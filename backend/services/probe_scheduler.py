@@ -0,0 +1,121 @@
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+from config import Config
+from utils import get_logger
+
+logger = get_logger('probe_scheduler')
+
+LIVENESS = 'liveness'
+TRIAL = 'trial'
+
+class ProbeScheduler:
+    """Per-gateway next-probe times kept in a min-heap, with intervals adapted to gateway state"""
+    
+    def __init__(self):
+        self.fast_interval = Config.GATEWAY_FAST_INTERVAL
+        self.base_interval = Config.GATEWAY_LIVENESS_INTERVAL
+        self.max_interval = max(Config.GATEWAY_MAX_INTERVAL, self.base_interval)
+        self.restart_window = Config.GATEWAY_RESTART_WINDOW
+        self.trial_interval = Config.GATEWAY_TRIAL_INTERVAL
+        self.trial_urgent_interval = min(Config.GATEWAY_TRIAL_URGENT_INTERVAL, self.trial_interval)
+        self.trial_urgent_hours = Config.TRIAL_URGENT_HOURS
+        
+        self._heap = []
+        self._next_due: Dict[tuple, float] = {}
+        self._intervals: Dict[tuple, float] = {}
+        self._restarted_at: Dict[str, float] = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+    
+    def is_due(self, key, tier: str) -> bool:
+        """Whether a gateway's tier should be probed now; unscheduled gateways are always due"""
+        with self._lock:
+            next_due = self._next_due.get((key, tier))
+        return next_due is None or time.monotonic() >= next_due
+    
+    def record(self, key, tier: str, result: Optional[Dict], urgent: bool = False) -> float:
+        """Schedule the next probe of a tier from the result of the one just made"""
+        now = time.monotonic()
+        with self._lock:
+            if tier == LIVENESS:
+                interval = self._liveness_interval(key, result, now)
+            elif urgent:
+                interval = self.trial_urgent_interval
+            else:
+                interval = self._trial_interval(result)
+            
+            self._intervals[(key, tier)] = interval
+            self._next_due[(key, tier)] = now + interval
+            heapq.heappush(self._heap, (now + interval, next(self._counter), key, tier))
+        return interval
+    
+    def mark_restarted(self, key):
+        """Probe a gateway right away and at the fast cadence while it comes back up"""
+        with self._lock:
+            self._restarted_at[key] = time.monotonic()
+            for tier in (LIVENESS, TRIAL):
+                self._next_due.pop((key, tier), None)
+                self._intervals.pop((key, tier), None)
+        logger.info("Gateway probe cadence reset after restart", gateway=key)
+    
+    def make_due(self, key, tier: str):
+        """Probe one tier of a gateway on the next refresh"""
+        with self._lock:
+            self._next_due.pop((key, tier), None)
+    
+    def seconds_until_next(self) -> Optional[float]:
+        """Seconds until the earliest scheduled probe, or None if nothing is scheduled"""
+        with self._lock:
+            while self._heap:
+                due, _, key, tier = self._heap[0]
+                # Entries superseded by a later record() are dropped lazily
+                if self._next_due.get((key, tier)) != due:
+                    heapq.heappop(self._heap)
+                    continue
+                return max(0.0, due - time.monotonic())
+        return None
+    
+    def describe(self, key) -> Dict:
+        """Current interval and next probe time per tier, for API payloads"""
+        now = time.monotonic()
+        wall_now = time.time()
+        schedule = {}
+        with self._lock:
+            for tier in (LIVENESS, TRIAL):
+                due = self._next_due.get((key, tier))
+                schedule[tier] = {
+                    'interval': self._intervals.get((key, tier)),
+                    'next_probe': datetime.utcfromtimestamp(wall_now + max(0.0, due - now)).isoformat() if due else None
+                }
+        return schedule
+    
+    def _liveness_interval(self, key, result: Optional[Dict], now: float) -> float:
+        status = (result or {}).get('status')
+        restarted_at = self._restarted_at.get(key)
+        recently_restarted = restarted_at is not None and now - restarted_at < self.restart_window
+        
+        if status == 'starting' or (recently_restarted and status != 'healthy'):
+            return self.fast_interval
+        if status != 'healthy':
+            return self.base_interval
+        if recently_restarted:
+            # First healthy answer after a restart; resume the normal cadence
+            self._restarted_at.pop(key, None)
+            return self.base_interval
+        
+        # Each further healthy probe backs the cadence off towards the maximum
+        previous = self._intervals.get((key, LIVENESS))
+        if previous is None:
+            return self.base_interval
+        return min(self.max_interval, max(self.base_interval, previous * 1.5))
+    
+    def _trial_interval(self, result: Optional[Dict]) -> float:
+        if not result:
+            return self.trial_urgent_interval
+        if result.get('expired') or result.get('remaining_hours', 0) <= self.trial_urgent_hours:
+            return self.trial_urgent_interval
+        return self.trial_interval
@@ -0,0 +1,196 @@
+import json
+import os
+import socket
+import threading
+from typing import Dict, Optional
+import psycopg2
+from prometheus_client import Gauge
+from config import Config
+from utils import get_logger
+
+logger = get_logger('replica_coordinator')
+
+# Prometheus metrics
+PROBER_ROLE = Gauge('gateway_prober_leader', 'Whether this process owns gateway probing (1) or reads snapshots (0)')
+
+LEADER = 'leader'
+FOLLOWER = 'follower'
+STANDALONE = 'standalone'
+
+SNAPSHOT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS gateway_status_snapshots (
+    id SMALLINT PRIMARY KEY,
+    version BIGINT NOT NULL,
+    gateways JSONB NOT NULL,
+    created_at DOUBLE PRECISION NOT NULL,
+    built_by TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS gateway_connectivity_history (
+    id SMALLINT PRIMARY KEY,
+    history JSONB NOT NULL,
+    created_at DOUBLE PRECISION NOT NULL,
+    built_by TEXT NOT NULL
+)
+"""
+
+class ReplicaCoordinator:
+    """Elects one backend process to probe gateways through a PostgreSQL advisory lock"""
+    
+    def __init__(self, lock_id: Optional[int] = None):
+        self.lock_id = lock_id or Config.GATEWAY_LEADER_LOCK_ID
+        self.identity = f"{socket.gethostname()}:{os.getpid()}"
+        self.role = STANDALONE
+        self._conn = None
+        self._lock = threading.Lock()
+    
+    def elect(self) -> bool:
+        """Keep or try to take leadership; True when this process should probe"""
+        with self._lock:
+            try:
+                conn = self._connection()
+                with conn.cursor() as cursor:
+                    if self.role == LEADER:
+                        # The lock lives as long as the session, so a live
+                        # session means leadership is still held
+                        cursor.execute("SELECT 1")
+                    else:
+                        cursor.execute("SELECT pg_try_advisory_lock(%s)", (self.lock_id,))
+                        self._set_role(LEADER if cursor.fetchone()[0] else FOLLOWER)
+            except psycopg2.Error as e:
+                # Without the database every replica probes on its own
+                logger.warning("Leader election unavailable, probing locally", error=str(e))
+                self._disconnect()
+                self._set_role(STANDALONE)
+            return self.role != FOLLOWER
+    
+    def publish(self, snapshot):
+        """Write the leader's snapshot for followers to read"""
+        if self.role != LEADER:
+            return
+        
+        with self._lock:
+            try:
+                conn = self._connection()
+                if self.role != LEADER:
+                    # The session dropped since the election, and the lock with it
+                    return
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        """
+                        INSERT INTO gateway_status_snapshots (id, version, gateways, created_at, built_by)
+                        VALUES (1, %s, %s, %s, %s)
+                        ON CONFLICT (id) DO UPDATE SET
+                            version = excluded.version,
+                            gateways = excluded.gateways,
+                            created_at = excluded.created_at,
+                            built_by = excluded.built_by
+                        """,
+                        (snapshot.version, json.dumps(list(snapshot.gateways)), snapshot.created_at, self.identity)
+                    )
+            except psycopg2.Error as e:
+                logger.error("Failed to publish status snapshot, giving up leadership", error=str(e))
+                self._disconnect()
+                self._set_role(STANDALONE)
+    
+    def load_snapshot(self) -> Optional[Dict]:
+        """Read the snapshot most recently published by the leader"""
+        with self._lock:
+            try:
+                with self._connection().cursor() as cursor:
+                    cursor.execute(
+                        "SELECT version, gateways, created_at, built_by FROM gateway_status_snapshots WHERE id = 1"
+                    )
+                    row = cursor.fetchone()
+            except psycopg2.Error as e:
+                logger.warning("Failed to read status snapshot", error=str(e))
+                self._disconnect()
+                return None
+        
+        if row is None:
+            return None
+        version, gateways, created_at, built_by = row
+        return {'version': version, 'gateways': gateways, 'created_at': created_at, 'built_by': built_by}
+    
+    def publish_connectivity(self, history: Dict):
+        """Write the leader's connectivity history for followers to read"""
+        if self.role != LEADER:
+            return
+        
+        with self._lock:
+            try:
+                conn = self._connection()
+                if self.role != LEADER:
+                    return
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        """
+                        INSERT INTO gateway_connectivity_history (id, history, created_at, built_by)
+                        VALUES (1, %s, %s, %s)
+                        ON CONFLICT (id) DO UPDATE SET
+                            history = excluded.history,
+                            created_at = excluded.created_at,
+                            built_by = excluded.built_by
+                        """,
+                        (json.dumps(history), history['published_at'], self.identity)
+                    )
+            except psycopg2.Error as e:
+                logger.error("Failed to publish connectivity history, giving up leadership", error=str(e))
+                self._disconnect()
+                self._set_role(STANDALONE)
+    
+    def load_connectivity(self) -> Optional[Dict]:
+        """Read the connectivity history most recently published by the leader"""
+        with self._lock:
+            try:
+                with self._connection().cursor() as cursor:
+                    cursor.execute("SELECT history FROM gateway_connectivity_history WHERE id = 1")
+                    row = cursor.fetchone()
+            except psycopg2.Error as e:
+                logger.warning("Failed to read connectivity history", error=str(e))
+                self._disconnect()
+                return None
+        return row[0] if row else None
+    
+    def _connection(self):
+        """Session that holds the advisory lock; reconnecting forfeits leadership"""
+        if self._conn is None or self._conn.closed:
+            if self.role == LEADER:
+                self._set_role(FOLLOWER)
+            # Keepalives make a vanished leader's session, and with it the
+            # lock, expire within about one check interval
+            self._conn = psycopg2.connect(
+                host=Config.DB_HOST,
+                dbname=Config.DB_NAME,
+                user=Config.DB_USER,
+                password=Config.DB_PASSWORD,
+                connect_timeout=Config.GATEWAY_CONNECT_TIMEOUT,
+                application_name=f"firebox-prober {self.identity}",
+                keepalives=1,
+                keepalives_idle=max(1, Config.GATEWAY_CHECK_INTERVAL // 3),
+                keepalives_interval=max(1, Config.GATEWAY_CHECK_INTERVAL // 6),
+                keepalives_count=2
+            )
+            self._conn.autocommit = True
+            with self._conn.cursor() as cursor:
+                cursor.execute(SNAPSHOT_SCHEMA)
+        return self._conn
+    
+    def _disconnect(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except psycopg2.Error:
+                pass
+        self._conn = None
+    
+    def _set_role(self, role: str):
+        if role != self.role:
+            logger.info("Gateway prober role changed", previous=self.role, role=role, identity=self.identity)
+        self.role = role
+        PROBER_ROLE.set(1 if role != FOLLOWER else 0)
+
+def create_replica_coordinator() -> Optional[ReplicaCoordinator]:
+    """Coordinator for the configured mode, or None when every process probes on its own"""
+    if Config.GATEWAY_COORDINATION == 'postgres':
+        return ReplicaCoordinator()
+    return None
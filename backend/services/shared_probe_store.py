@@ -0,0 +1,134 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Any, Optional, Tuple
+from config import Config
+from utils import get_logger
+
+logger = get_logger('shared_probe_store')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS probe_results (
+    key TEXT PRIMARY KEY,
+    value TEXT,
+    stored_at REAL,
+    lease_owner TEXT,
+    lease_until REAL
+)
+"""
+
+class SharedProbeStore:
+    """Probe results and probe leases in a SQLite file shared by every worker process on the host"""
+    
+    def __init__(self, path: str, lease_seconds: Optional[float] = None):
+        self.path = path
+        # A lease outlives the slowest probe, so a crashed worker only delays others
+        self.lease_seconds = lease_seconds or Config.GATEWAY_TIMEOUT * 2
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._lock = threading.Lock()
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(SCHEMA)
+        logger.info("Shared probe store opened", path=path, owner=self.owner)
+    
+    def read(self, key: str) -> Optional[Tuple[float, Any]]:
+        """Get (stored_at, value) for the latest probe of a key by any worker"""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT stored_at, value FROM probe_results WHERE key = ? AND value IS NOT NULL",
+                    (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Shared probe store read failed", key=key, error=str(e))
+            return None
+        return (row[0], json.loads(row[1])) if row else None
+    
+    def claim(self, key: str) -> bool:
+        """Take the lease to probe a key; False while another worker holds it"""
+        now = time.time()
+        try:
+            with self._lock:
+                cursor = self._conn.execute(
+                    """
+                    INSERT INTO probe_results (key, lease_owner, lease_until) VALUES (?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET
+                        lease_owner = excluded.lease_owner,
+                        lease_until = excluded.lease_until
+                    WHERE probe_results.lease_until IS NULL
+                       OR probe_results.lease_until <= ?
+                       OR probe_results.lease_owner = excluded.lease_owner
+                    """,
+                    (key, self.owner, now + self.lease_seconds, now)
+                )
+                return cursor.rowcount == 1
+        except sqlite3.Error as e:
+            # Without the store every worker falls back to probing on its own
+            logger.warning("Shared probe store claim failed", key=key, error=str(e))
+            return True
+    
+    def write(self, key: str, value: Any):
+        """Publish a probe result and release the lease on its key"""
+        try:
+            with self._lock:
+                self._conn.execute(
+                    """
+                    INSERT INTO probe_results (key, value, stored_at) VALUES (?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET
+                        value = excluded.value,
+                        stored_at = excluded.stored_at,
+                        lease_owner = NULL,
+                        lease_until = NULL
+                    """,
+                    (key, json.dumps(value), time.time())
+                )
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning("Shared probe store write failed", key=key, error=str(e))
+    
+    def release(self, key: str):
+        """Give up a lease without publishing a result"""
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE probe_results SET lease_owner = NULL, lease_until = NULL WHERE key = ? AND lease_owner = ?",
+                    (key, self.owner)
+                )
+        except sqlite3.Error as e:
+            logger.warning("Shared probe store release failed", key=key, error=str(e))
+    
+    def delete(self, key: str):
+        """Forget a key's result for every worker"""
+        try:
+            with self._lock:
+                self._conn.execute("DELETE FROM probe_results WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            logger.warning("Shared probe store delete failed", key=key, error=str(e))
+
+# One store per process; every worker on the host opens the same file
+_store = None
+_store_lock = threading.Lock()
+
+def get_shared_probe_store() -> Optional[SharedProbeStore]:
+    """Get the process-wide shared probe store, or None when it is disabled or unusable"""
+    global _store
+    
+    if not Config.GATEWAY_SHARED_CACHE_PATH:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                try:
+                    _store = SharedProbeStore(Config.GATEWAY_SHARED_CACHE_PATH)
+                except (OSError, sqlite3.Error) as e:
+                    logger.error("Failed to open shared probe store, probing per worker",
+                                 path=Config.GATEWAY_SHARED_CACHE_PATH, error=str(e))
+                    return None
+    return _store
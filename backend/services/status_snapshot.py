@@ -0,0 +1,167 @@
+import copy
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from prometheus_client import Gauge, Histogram
+from config import Config
+from utils import get_logger
+from services.replica_coordinator import FOLLOWER, create_replica_coordinator
+
+logger = get_logger('status_snapshot')
+
+# Prometheus metrics
+SNAPSHOT_VERSION = Gauge('gateway_status_snapshot_version', 'Version of the current gateway status snapshot')
+SNAPSHOT_REFRESH_DURATION = Histogram(
+    'gateway_status_snapshot_refresh_seconds',
+    'Time spent building a gateway status snapshot'
+)
+
+@dataclass(frozen=True)
+class StatusSnapshot:
+    """Immutable, versioned view of every gateway's status"""
+    version: int
+    gateways: Tuple[Dict, ...] = ()
+    created_at: float = field(default_factory=time.time)
+    created_monotonic: float = field(default_factory=time.monotonic)
+    built_by: Optional[str] = None
+    
+    @property
+    def age(self) -> float:
+        """Seconds since this snapshot was built"""
+        return time.monotonic() - self.created_monotonic
+    
+    def to_metadata(self) -> Dict:
+        """Describe the snapshot for API responses"""
+        return {
+            'version': self.version,
+            'age_seconds': round(self.age, 3),
+            'timestamp': datetime.utcfromtimestamp(self.created_at).isoformat() if self.version else None,
+            'built_by': self.built_by
+        }
+
+# Floor on the refresher's sleep so a burst of due probes cannot spin it
+MIN_REFRESH_WAIT = 1.0
+
+class StatusSnapshotEngine:
+    """Refreshes gateway status in the background so routes never probe inline"""
+    
+    def __init__(self, gateway_service, interval: Optional[int] = None, coordinator=None):
+        self.gateway_service = gateway_service
+        self.interval = interval or Config.GATEWAY_CHECK_INTERVAL
+        
+        # With several replicas only the elected leader probes; the others
+        # read the snapshots it publishes
+        self.coordinator = coordinator or create_replica_coordinator()
+        
+        self._snapshot = StatusSnapshot(version=0)
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        
+        # Container state changes show up in the next snapshot right away
+        gateway_service.docker_service.add_event_listener(self._on_container_event)
+    
+    def start(self):
+        """Start the background refresher if it is not already running"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='status-snapshot', daemon=True)
+            self._thread.start()
+        logger.info("Status snapshot engine started", interval=self.interval)
+    
+    def stop(self):
+        """Stop the background refresher"""
+        self._stop.set()
+        self._wake.set()
+    
+    def request_refresh(self):
+        """Wake the refresher so the next snapshot is built immediately"""
+        self._wake.set()
+    
+    def _on_container_event(self, gateway_name: str, action: str, container: Dict):
+        """Rebuild the snapshot when a gateway container changes state"""
+        self.request_refresh()
+    
+    def get_snapshot(self, wait: Optional[float] = None) -> StatusSnapshot:
+        """Return the current snapshot, optionally waiting for the first one to be built"""
+        if wait and not self._ready.is_set():
+            self._ready.wait(wait)
+        return self._snapshot
+    
+    def refresh(self) -> StatusSnapshot:
+        """Build and publish a new snapshot, or adopt the leader's when following"""
+        if self.coordinator is not None and not self.coordinator.elect():
+            return self._follow()
+        
+        start_time = time.time()
+        gateways = self.gateway_service.get_all_gateways()
+        
+        # Published snapshots are never mutated, so they must not share
+        # dicts with the gateway service's caches
+        snapshot = StatusSnapshot(
+            version=self._snapshot.version + 1,
+            gateways=tuple(copy.deepcopy(gateway) for gateway in gateways),
+            built_by=self.coordinator.identity if self.coordinator else None
+        )
+        self._snapshot = snapshot
+        self._ready.set()
+        if self.coordinator is not None:
+            self.coordinator.publish(snapshot)
+        
+        duration = time.time() - start_time
+        SNAPSHOT_VERSION.set(snapshot.version)
+        SNAPSHOT_REFRESH_DURATION.observe(duration)
+        logger.info("Status snapshot refreshed",
+                   version=snapshot.version,
+                   gateways=len(snapshot.gateways),
+                   duration_ms=round(duration * 1000, 2))
+        return snapshot
+    
+    def _follow(self) -> StatusSnapshot:
+        """Adopt the snapshot the leader published last"""
+        published = self.coordinator.load_snapshot()
+        if published is None or published['version'] == self._snapshot.version:
+            return self._snapshot
+        
+        # Age is measured from when the leader built the snapshot
+        age = max(0.0, time.time() - published['created_at'])
+        snapshot = StatusSnapshot(
+            version=published['version'],
+            gateways=tuple(published['gateways']),
+            created_at=published['created_at'],
+            created_monotonic=time.monotonic() - age,
+            built_by=published['built_by']
+        )
+        self._snapshot = snapshot
+        self._ready.set()
+        SNAPSHOT_VERSION.set(snapshot.version)
+        return snapshot
+    
+    def _run(self):
+        """Refresh loop driven by the gateway check interval"""
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error("Status snapshot refresh failed", error=str(e))
+            
+            self._wake.wait(self._next_wait())
+            self._wake.clear()
+    
+    def _next_wait(self) -> float:
+        """Sleep until the earliest scheduled gateway probe, but no longer than the check interval"""
+        if self.coordinator is not None and self.coordinator.role == FOLLOWER:
+            # Reading the leader's snapshot is cheap, and each read is also
+            # a chance to take over from a leader that went away
+            return min(self.interval, Config.GATEWAY_FAST_INTERVAL)
+        
+        due_in = self.gateway_service.scheduler.seconds_until_next()
+        if due_in is None:
+            return self.interval
+        return min(self.interval, max(MIN_REFRESH_WAIT, due_in))
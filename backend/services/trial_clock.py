@@ -0,0 +1,114 @@
+import math
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional
+from prometheus_client import Counter
+from config import Config
+from utils import get_logger
+from services.trial_parser import EXPIRED_TRIAL
+
+logger = get_logger('trial_clock')
+
+# Prometheus metrics
+TRIAL_PREDICTIONS = Counter('gateway_trial_predictions_total', 'Trial readings served from the extrapolated clock')
+TRIAL_DRIFT = Counter('gateway_trial_drift_total', 'Trial scrapes that disagreed with the extrapolated clock')
+
+@dataclass(frozen=True)
+class TrialAnchor:
+    """One scraped trial reading and when it was taken"""
+    remaining_hours: int
+    resolution_hours: int
+    observed_monotonic: float
+    observed_at: float
+    
+    def elapsed_hours(self) -> float:
+        return (time.monotonic() - self.observed_monotonic) / 3600
+    
+    def predicted_range(self):
+        """Lowest and highest remaining hours consistent with the reading"""
+        elapsed = self.elapsed_hours()
+        return (self.remaining_hours - elapsed,
+                self.remaining_hours + self.resolution_hours - elapsed)
+
+class TrialClock:
+    """Counts each gateway's trial down from its last scraped reading"""
+    
+    def __init__(self, drift_threshold_hours: Optional[float] = None):
+        self.drift_threshold_hours = (Config.TRIAL_DRIFT_THRESHOLD_HOURS
+                                      if drift_threshold_hours is None else drift_threshold_hours)
+        self._anchors: Dict[int, TrialAnchor] = {}
+        self._lock = threading.Lock()
+    
+    def predict(self, key) -> Optional[Dict]:
+        """Trial information extrapolated from the anchor, or None without one"""
+        anchor = self._anchors.get(key)
+        if anchor is None:
+            return None
+        
+        TRIAL_PREDICTIONS.inc()
+        # A reading covers a range (e.g. "5 days" is 120-143 hours), so report
+        # what the next scrape would show: count down from the top of the
+        # range and floor to the reading's resolution, which is hours below a day
+        _, remaining = anchor.predicted_range()
+        resolution = anchor.resolution_hours if remaining >= 24 else 1
+        trial_info = trial_info_from_hours(math.floor(remaining / resolution) * resolution)
+        trial_info['extrapolated'] = True
+        trial_info['observed_at'] = datetime.utcfromtimestamp(anchor.observed_at).isoformat()
+        return trial_info
+    
+    def observe(self, key, trial_info: Dict) -> bool:
+        """Anchor a fresh scrape, returning True if it drifted from the prediction"""
+        resolution = 24 if 'day' in trial_info.get('remaining_display', '') else 1
+        anchor = TrialAnchor(
+            remaining_hours=int(trial_info.get('remaining_hours', 0)),
+            resolution_hours=resolution,
+            observed_monotonic=time.monotonic(),
+            observed_at=time.time()
+        )
+        
+        with self._lock:
+            previous = self._anchors.get(key)
+            self._anchors[key] = anchor
+        
+        if previous is None:
+            return False
+        
+        low, high = previous.predicted_range()
+        observed_low = anchor.remaining_hours
+        observed_high = anchor.remaining_hours + anchor.resolution_hours
+        drifted = (observed_low > high + self.drift_threshold_hours or
+                   observed_high < low - self.drift_threshold_hours)
+        if drifted:
+            TRIAL_DRIFT.inc()
+            logger.warning("Trial clock drifted",
+                           gateway=key,
+                           predicted_hours=[round(low, 1), round(high, 1)],
+                           observed_hours=[observed_low, observed_high])
+        return drifted
+    
+    def invalidate(self, key):
+        """Forget a gateway's anchor, e.g. after a restart or trial reset"""
+        with self._lock:
+            self._anchors.pop(key, None)
+
+def trial_info_from_hours(remaining_hours: float) -> Dict:
+    """Trial information for a number of remaining hours, shaped like a scraped reading"""
+    if remaining_hours <= 0:
+        return dict(EXPIRED_TRIAL)
+    
+    hours = int(math.floor(remaining_hours))
+    if hours >= 24:
+        days = hours // 24
+        display = f"{days} day{'s' if days != 1 else ''}"
+    else:
+        display = f"{hours} hour{'s' if hours != 1 else ''}"
+    
+    return {
+        'remaining_hours': hours,
+        'remaining_display': display,
+        'expired': False,
+        'emergency': hours < 24,
+        'trial_state': 'TRIAL'
+    }
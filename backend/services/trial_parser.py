@@ -0,0 +1,176 @@
+import codecs
+import html
+import re
+from typing import Dict, Iterable, Optional
+from config import Config
+
+# Optional faster HTML backends, used when a whole document is parsed at once
+try:
+    from selectolax.parser import HTMLParser as SelectolaxParser
+    PARSER_BACKEND = 'selectolax'
+except ImportError:
+    try:
+        import lxml.html
+        PARSER_BACKEND = 'lxml'
+    except ImportError:
+        PARSER_BACKEND = 'regex'
+
+# Trial-related text patterns, in priority order, each with a keyword it
+# cannot match without so most text is skipped by a plain substring test
+TRIAL_PATTERNS = [
+    ('remaining', re.compile(r'trial.*?(\d+)\s*days?\s*remaining')),
+    ('remaining', re.compile(r'(\d+)\s*hours?\s*remaining')),
+    ('expire', re.compile(r'trial.*?expires?\s*in\s*(\d+)'))
+]
+EXPIRED_PATTERN = re.compile(r'expired|emergency')
+TAG_PATTERN = re.compile(r'<[^>]*>')
+
+EXPIRED_TRIAL = {
+    'remaining_hours': 0,
+    'remaining_display': 'Expired',
+    'expired': True,
+    'emergency': True,
+    'trial_state': 'EXPIRED'
+}
+
+# The patterns match within one line of text, so the unfinished line is carried
+# between chunks: from its first "trial" when it has one, otherwise this much,
+# enough for an hours-remaining countdown split across a boundary
+WINDOW_OVERLAP = 512
+# Longest unterminated tag carried into the next chunk
+MAX_TAG_CARRY = 4096
+
+class TrialInfoExtractor:
+    """Incrementally scans status page HTML, stopping early at a days-remaining marker
+    
+    Gives the same answer as matching the patterns against the whole page text
+    in priority order, whatever the chunk boundaries. Only the first pattern can
+    end the scan early; lower priority matches are held until the page ends.
+    """
+    
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes or Config.TRIAL_SCRAPE_MAX_BYTES
+        self.bytes_read = 0
+        self.result = None
+        self._line = ''
+        self._tag_carry = ''
+        self._candidates: Dict[int, Dict] = {}
+        self._saw_expired = False
+    
+    @property
+    def done(self) -> bool:
+        """Whether scanning can stop, because a marker was found or the size cap was reached"""
+        return self.result is not None or self.bytes_read >= self.max_bytes
+    
+    def feed(self, chunk: str, size: Optional[int] = None) -> Optional[Dict]:
+        """Scan the next piece of HTML, returning trial info as soon as a marker is seen"""
+        if self.done:
+            return self.result
+        
+        self.bytes_read += len(chunk) if size is None else size
+        
+        raw = self._tag_carry + chunk
+        # Hold back a tag that is split across chunks
+        tag_start = raw.rfind('<')
+        if tag_start > raw.rfind('>') and len(raw) - tag_start <= MAX_TAG_CARRY:
+            self._tag_carry = raw[tag_start:]
+            raw = raw[:tag_start]
+        else:
+            self._tag_carry = ''
+        
+        text = html.unescape(TAG_PATTERN.sub('', raw)).lower()
+        window = self._line + text
+        line = window[window.rfind('\n') + 1:]
+        trial_at = line.find('trial')
+        self._line = line[trial_at:] if trial_at >= 0 else line[-WINDOW_OVERLAP:]
+        
+        if not self._saw_expired and EXPIRED_PATTERN.search(window):
+            self._saw_expired = True
+        return self._scan(window, final=False)
+    
+    def finish(self) -> Optional[Dict]:
+        """Result once the page (or the size cap) has been consumed"""
+        if self.result is None:
+            self._scan(self._line, final=True)
+        if self.result is None and self._candidates:
+            self.result = self._candidates[min(self._candidates)]
+        if self.result is None and self._saw_expired:
+            self.result = dict(EXPIRED_TRIAL)
+        return self.result
+    
+    def _scan(self, window: str, final: bool) -> Optional[Dict]:
+        """Match each pattern in window, ignoring matches more text could still extend"""
+        for priority, (keyword, pattern) in enumerate(TRIAL_PATTERNS):
+            if priority in self._candidates or keyword not in window:
+                continue
+            match = pattern.search(window)
+            if not match or (match.end() == len(window) and not final):
+                continue
+            if priority == 0:
+                self.result = _trial_from_match(match)
+                return self.result
+            self._candidates[priority] = _trial_from_match(match)
+        return None
+
+def extract_trial_info_from_stream(chunks: Iterable[bytes], encoding: Optional[str] = None,
+                                   max_bytes: Optional[int] = None) -> Optional[Dict]:
+    """Scan a streamed response body, reading no further than needed"""
+    extractor = TrialInfoExtractor(max_bytes=max_bytes)
+    decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+    
+    for chunk in chunks:
+        extractor.feed(decoder.decode(chunk), size=len(chunk))
+        if extractor.done:
+            break
+    
+    return extractor.finish()
+
+def parse_trial_info(html_content: str) -> Optional[Dict]:
+    """Parse trial information from a complete status page"""
+    if PARSER_BACKEND == 'regex':
+        extractor = TrialInfoExtractor(max_bytes=max(len(html_content), 1))
+        extractor.feed(html_content)
+        return extractor.finish()
+    
+    text = _document_text(html_content).lower()
+    match = _search_trial_patterns(text)
+    if match:
+        return _trial_from_match(match)
+    
+    if EXPIRED_PATTERN.search(text):
+        return dict(EXPIRED_TRIAL)
+    return None
+
+def _document_text(html_content: str) -> str:
+    """Text content of a whole document using the fastest installed backend"""
+    if PARSER_BACKEND == 'selectolax':
+        return SelectolaxParser(html_content).text(separator='')
+    return lxml.html.fromstring(html_content).text_content()
+
+def _search_trial_patterns(text: str):
+    """First trial countdown match in text, trying patterns in priority order"""
+    for keyword, pattern in TRIAL_PATTERNS:
+        if keyword in text:
+            match = pattern.search(text)
+            if match:
+                return match
+    return None
+
+def _trial_from_match(match) -> Dict:
+    """Build trial information from a countdown pattern match"""
+    remaining = int(match.group(1))
+    
+    if 'day' in match.group(0):
+        remaining_hours = remaining * 24
+        display = f"{remaining} day{'s' if remaining != 1 else ''}"
+    else:
+        remaining_hours = remaining
+        display = f"{remaining} hour{'s' if remaining != 1 else ''}"
+    
+    return {
+        'remaining_hours': remaining_hours,
+        'remaining_display': display,
+        'expired': False,
+        'emergency': remaining_hours < 24,
+        'trial_state': 'TRIAL'
+    }
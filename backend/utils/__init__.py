@@ -1,5 +1,7 @@
 # Utils package initialization
 from .logging import setup_logging, get_logger, log_request_info, log_response_info
+from .circuit_breaker import CircuitBreaker
+from .deadline import Deadline
 from .validators import (
     GatewayStatusSchema, 
     TrialResetRequestSchema, 
@@ -15,6 +17,8 @@ __all__ = [
     'get_logger', 
     'log_request_info',
     'log_response_info',
+    'CircuitBreaker',
+    'Deadline',
     'GatewayStatusSchema',
     'TrialResetRequestSchema',
     'SystemHealthSchema',
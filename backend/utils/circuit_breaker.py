@@ -0,0 +1,98 @@
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Dict
+
+class CircuitBreaker:
+    """Closed/open/half-open circuit breaker with exponential backoff and jitter"""
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, name: str, failure_threshold: int = 3, base_delay: float = 1.0,
+                 max_delay: float = 60.0, jitter: float = 0.2):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        
+        self._state = self.CLOSED
+        self._failures = 0
+        self._open_count = 0
+        self._next_attempt = 0.0
+        self._trial_in_progress = False
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        """Current state; an open circuit becomes half-open once its backoff has elapsed"""
+        with self._lock:
+            return self._current_state()
+    
+    @property
+    def is_open(self) -> bool:
+        return self.state == self.OPEN
+    
+    def allow_request(self) -> bool:
+        """Whether a call may go through; half-open admits a single trial call"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_progress:
+                self._trial_in_progress = True
+                return True
+            return False
+    
+    def record_success(self):
+        """Close the circuit after a successful call"""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._open_count = 0
+            self._trial_in_progress = False
+    
+    def record_failure(self):
+        """Count a failed call, opening the circuit once the threshold is reached"""
+        with self._lock:
+            self._failures += 1
+            trial_failed = self._trial_in_progress
+            self._trial_in_progress = False
+            if trial_failed or self._failures >= self.failure_threshold:
+                self._open()
+    
+    def seconds_until_retry(self) -> float:
+        """Seconds until an open circuit admits its next trial call"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return 0.0
+            return max(0.0, self._next_attempt - time.monotonic())
+    
+    def to_dict(self) -> Dict:
+        """Describe the breaker for API responses"""
+        with self._lock:
+            state = self._current_state()
+            next_attempt = None
+            if state != self.CLOSED:
+                wait = max(0.0, self._next_attempt - time.monotonic())
+                next_attempt = datetime.utcfromtimestamp(time.time() + wait).isoformat()
+            return {
+                'state': state,
+                'consecutive_failures': self._failures,
+                'next_attempt': next_attempt
+            }
+    
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() >= self._next_attempt:
+            self._state = self.HALF_OPEN
+        return self._state
+    
+    def _open(self):
+        self._open_count += 1
+        delay = min(self.max_delay, self.base_delay * (2 ** (self._open_count - 1)))
+        delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        self._state = self.OPEN
+        self._next_attempt = time.monotonic() + delay
@@ -0,0 +1,44 @@
+import time
+from typing import Dict, Mapping
+
+class Deadline:
+    """Latency budget for one request, passed down to every call made while serving it"""
+    
+    def __init__(self, budget_ms: int):
+        self.budget_ms = budget_ms
+        self.exceeded = False
+        self._expires = time.monotonic() + budget_ms / 1000
+    
+    @classmethod
+    def from_args(cls, args: Mapping, default_ms: int, max_ms: int) -> 'Deadline':
+        """Build a deadline from a deadline_ms query parameter, clamped to max_ms"""
+        value = args.get('deadline_ms')
+        if value in (None, ''):
+            return cls(min(default_ms, max_ms))
+        
+        try:
+            budget_ms = int(value)
+        except (TypeError, ValueError):
+            raise ValueError('deadline_ms must be an integer')
+        if budget_ms <= 0:
+            raise ValueError('deadline_ms must be positive')
+        return cls(min(budget_ms, max_ms))
+    
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self._expires
+    
+    def remaining(self) -> float:
+        """Seconds left in the budget"""
+        return max(0.0, self._expires - time.monotonic())
+    
+    def mark_exceeded(self):
+        """Note that some work was cut short to stay within the budget"""
+        self.exceeded = True
+    
+    def to_dict(self) -> Dict:
+        """Describe the budget for API responses"""
+        return {
+            'budget_ms': self.budget_ms,
+            'exceeded': self.exceeded
+        }